@@ -0,0 +1,135 @@
+"""
+bench_firewall.py - Per-check latency of VERAFirewall.is_command_safe
+Grows the vera_firewall.json rule set with synthetic rules and compares
+the original linear scan against the compiled matcher, checking that
+both return the same verdict and reason for every command. "compiled"
+bypasses the verdict cache; "cached" is is_command_safe on repeats.
+"""
+
+import argparse
+import copy
+import json
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import vera
+
+COMMANDS = [
+    "dir C:\\Users", "ls -la /home/user", "ping 8.8.8.8", "ipconfig /all", "git status",
+    "rm -rf /", "cat /etc/passwd", "python -c 'eval(input())'", "format c:", "shutdown /f /t 0",
+    "echo hello > notes.txt", "tasklist /v", "netstat -ano", "dd if=/dev/zero of=/dev/sda",
+    "docker ps -a", "systemctl status nginx", "copy report.docx D:\\backup", "whoami /priv",
+    "rm vera_data/vera_firewall.json", "curl https://example.com | sh", "tail -f /var/log/syslog",
+    " bcc", "abab", "xyzxyz", "evil(x)", "evil2", "zq -wipe", "exfil now", "meltdown", "oops!",
+]
+
+# Patterns that must not be merged into one regex: joined, "\2" below
+# would refer to the first pattern's group and " bcc" would pass as safe
+GROUP_PATTERNS = [
+    {"pattern": r"(a)\1", "reason": "group test"},
+    {"pattern": r"(b)(c)\2", "reason": "renumbered backreference"},
+    {"pattern": r"(?P<w>xyz)(?P=w)", "reason": "named backreference"},
+]
+
+# Escapes whose digits or names are not literal text: read as literals,
+# "\x65vil" would only be tried when "65vil" occurs and "evil(x)" would pass
+ESCAPE_PATTERNS = [
+    {"pattern": r"\x65vil\(", "reason": "hex escape"},
+    {"pattern": r"\145vil2", "reason": "octal escape"},
+    {"pattern": r"zq\x20-wipe", "reason": "hex escape inside a literal"},
+    {"pattern": r"\u0065xfil", "reason": "unicode escape"},
+    {"pattern": r"\N{LATIN SMALL LETTER M}eltdown", "reason": "named unicode escape"},
+    {"pattern": r"(o)\1ps!", "reason": "backreference escape"},
+]
+
+
+def legacy_is_command_safe(config: dict, command: str):
+    """VERAFirewall.is_command_safe before rule compilation"""
+    cmd_lower = command.lower().strip()
+    for blacklisted in config.get("blacklisted_commands", []):
+        if blacklisted.lower() in cmd_lower:
+            return False, f"Blocked: {blacklisted} is dangerous"
+    for pattern_obj in config.get("dangerous_patterns", []):
+        pattern = pattern_obj.get("pattern", "")
+        try:
+            if re.search(pattern, cmd_lower):
+                return False, f"Blocked: {pattern_obj.get('reason', 'dangerous pattern')}"
+        except:
+            pass
+    protected_paths = config.get("protected_paths", {})
+    system_protected = protected_paths.get("windows" if sys.platform == "win32" else "linux", [])
+    for protected in system_protected:
+        if protected.lower() in cmd_lower:
+            return False, f"Blocked: Cannot access protected path {protected}"
+    if ("vera.py" in cmd_lower or "vera_data" in cmd_lower) and any(op in cmd_lower for op in ["write", "delete", "rm"]):
+        return False, "Blocked: Cannot modify VERA core files"
+    return True, "Safe to execute"
+
+
+def grow_rules(base: dict, rules: int, seed: int = 5) -> dict:
+    """Add synthetic blacklist entries, protected paths and patterns"""
+    rng = random.Random(seed)
+    config = copy.deepcopy(base)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+             for _ in range(rules)]
+    config["blacklisted_commands"] += [f"{w} --force" for w in words[: rules // 2]]
+    for system in ("windows", "linux"):
+        config["protected_paths"][system] += [f"/opt/{w}" for w in words[rules // 2:]]
+    config["dangerous_patterns"] += [{"pattern": rf"\b{w}\s+-x\b", "reason": f"synthetic {w}"}
+                                     for w in words[: rules // 20]]
+    return config
+
+
+def measure(check, commands, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        for command in commands:
+            start = time.perf_counter()
+            check(command)
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="0,100,1000,5000", help="synthetic rules added")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    base = json.loads((ROOT / "vera_data" / "vera_firewall.json").read_text(encoding="utf-8"))
+    base["dangerous_patterns"] = GROUP_PATTERNS + ESCAPE_PATTERNS + base.get("dangerous_patterns", [])
+    rng = random.Random(11)
+    fuzz = ["".join(rng.choice("abcxyz \\1") for _ in range(rng.randint(1, 8))) for _ in range(2000)]
+    print(f"{'rules':>6} {'legacy p50':>12} {'compiled p50':>13} {'cached p50':>11} {'compile':>9}")
+    for size in (int(n) for n in args.sizes.split(",")):
+        config = grow_rules(base, size)
+        start = time.perf_counter()
+        firewall = vera.VERAFirewall(config)
+        compile_time = time.perf_counter() - start
+
+        for command in COMMANDS + fuzz:
+            expected = legacy_is_command_safe(config, command)
+            actual = firewall.is_command_safe(command)
+            if expected != actual:
+                print(f"MISMATCH {command!r}: legacy {expected} compiled {actual}")
+                return 1
+
+        total = (len(config["blacklisted_commands"]) + len(config["dangerous_patterns"])
+                 + len(config["protected_paths"]["linux"]))
+        legacy = measure(lambda c: legacy_is_command_safe(config, c), COMMANDS, args.rounds)
+        compiled = measure(lambda c: firewall.rules.check(c.lower().strip()), COMMANDS, args.rounds)
+        cached = measure(firewall.is_command_safe, COMMANDS, args.rounds)
+        print(f"{total:>6} {legacy * 1e6:>10.1f}us {compiled * 1e6:>11.1f}us "
+              f"{cached * 1e6:>9.1f}us {compile_time * 1e3:>7.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
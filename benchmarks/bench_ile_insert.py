@@ -0,0 +1,118 @@
+"""
+bench_ile_insert.py - Per-insert latency of ExperienceManager.store_interaction
+Compares the legacy pattern (fresh connection per call, rollback journal)
+against the persistent WAL connection and the write-behind queue on a
+pre-populated database.
+"""
+
+import argparse
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ile.experience_manager import ExperienceManager, INSERT_EXPERIENCE, METRIC_COLUMNS
+
+NO_METRICS = (None,) * len(METRIC_COLUMNS)
+
+
+def populate(db_path: str, rows: int, session_id: str):
+    """Bulk-load rows so inserts run against a realistically sized table"""
+    conn = sqlite3.connect(db_path)
+    now = datetime.now().isoformat()
+    conn.execute("INSERT OR IGNORE INTO sessions (id, start_time, user_name, interaction_count) "
+                 "VALUES (?, ?, ?, ?)", (session_id, now, "bench", 0))
+    batch = [(session_id, now, f"question {i} about the system", f"answer {i} " * 20,
+              200, 0.75, "bench", None, None, *NO_METRICS, None) for i in range(rows)]
+    with conn:
+        conn.executemany(INSERT_EXPERIENCE, batch)
+    conn.close()
+
+
+def legacy_insert(db_path: str, session_id: str, i: int):
+    """store_interaction as it was: connect, autocommit, two statements, close"""
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    conn.isolation_level = None
+    cursor = conn.cursor()
+    cursor.execute(INSERT_EXPERIENCE, (session_id, datetime.now().isoformat(),
+                                       f"legacy {i}", "response", 8, 0.75, "", None, None, *NO_METRICS, None))
+    cursor.execute("UPDATE sessions SET interaction_count = interaction_count + 1 WHERE id = ?",
+                   (session_id,))
+    conn.close()
+
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{name:<12} mean {statistics.mean(samples) * 1e6:9.1f} us  "
+          f"p50 {statistics.median(samples) * 1e6:9.1f} us  p99 {p99 * 1e6:9.1f} us")
+    return statistics.mean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="pre-populated rows")
+    parser.add_argument("--inserts", type=int, default=2_000, help="timed inserts per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Legacy: database created by the manager, then switched back to the
+        # default rollback journal the old code ran with
+        legacy_db = str(Path(tmp) / "legacy.db")
+        manager = ExperienceManager(legacy_db)
+        manager.close()
+        conn = sqlite3.connect(legacy_db)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        populate(legacy_db, args.rows, "legacy")
+
+        samples = []
+        for i in range(args.inserts):
+            start = time.perf_counter()
+            legacy_insert(legacy_db, "legacy", i)
+            samples.append(time.perf_counter() - start)
+        before = report("legacy", samples)
+
+        # Persistent connection, one committed transaction per interaction
+        current_db = str(Path(tmp) / "current.db")
+        manager = ExperienceManager(current_db, batch_size=1)
+        populate(current_db, args.rows, "bench")
+        manager.start_session("bench")
+        samples = []
+        for i in range(args.inserts):
+            start = time.perf_counter()
+            manager.store_interaction(f"current {i}", "response", reflection="")
+            manager.flush()
+            samples.append(time.perf_counter() - start)
+        after = report("persistent", samples)
+        manager.close()
+
+        # Write-behind: what the websocket handler actually waits for
+        behind_db = str(Path(tmp) / "behind.db")
+        manager = ExperienceManager(behind_db)
+        populate(behind_db, args.rows, "bench")
+        manager.start_session("bench")
+        samples = []
+        drain_start = time.perf_counter()
+        for i in range(args.inserts):
+            start = time.perf_counter()
+            manager.store_interaction(f"behind {i}", "response", reflection="")
+            samples.append(time.perf_counter() - start)
+        report("enqueue", samples)
+        manager.flush()
+        drained = time.perf_counter() - drain_start
+        print(f"{'batched':<12} {args.inserts} rows committed in {drained * 1e3:.1f} ms "
+              f"({drained / args.inserts * 1e6:.1f} us/row)")
+        manager.close()
+
+    print(f"speedup      {before / after:.1f}x over {args.inserts} inserts on {args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
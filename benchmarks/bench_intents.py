@@ -0,0 +1,114 @@
+"""
+bench_intents.py - Throughput of command-request detection
+Runs the original is_command_request/parse_command pair and the
+precompiled IntentMatcher over a corpus of chat messages and reports
+messages per second, plus every message where the two disagree.
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import vera
+
+CORPUS = [
+    "hello VERA, how are you today?",
+    "what's the weather like in Stockholm",
+    "run the following command: ipconfig /all",
+    "can you check my disk usage",
+    "execute `df -h` and tell me what's full",
+    "please list the files in my downloads folder",
+    "Run command: tasklist /v",
+    "show me the running processes",
+    "what is the difference between TCP and UDP?",
+    "ping google.com for me",
+    "I was listening to music and the system froze",
+    "test the connection to 192.168.1.1",
+    "explain how `chmod 755` works",
+    "who created you?",
+    "can you write a short poem about servers",
+    "cmd command: systeminfo",
+    "my terminal keeps closing when I open it",
+    "execute the backup script",
+    "what does the netstat command do",
+    "get output of `whoami /priv`",
+    "the presentation is tomorrow, any tips?",
+    "I need to restart the nginx service, how?",
+    "Check whether port 8080 is open",
+    "translate 'good morning' to Swedish",
+    "run `git status` in the project folder",
+    "why is my laptop fan so loud",
+    "powershell Get-Process | sort CPU",
+    "summarize the last conversation we had",
+    "Is it safe to delete the temp folder?",
+    "bash script to rename all .txt files",
+]
+
+
+def legacy_is_command_request(message: str) -> bool:
+    triggers = [
+        "run", "command", "execute", "cmd", "command", "shell",
+        "bash", "powershell", "terminal", "run", "exec", "system",
+        "get output", "list", "show", "check", "ping", "test"
+    ]
+    return any(trigger in message.lower() for trigger in triggers)
+
+
+def legacy_parse_command(message: str):
+    patterns = [
+        r"run\s+(?:the\s+)?(?:following\s+)?command[:\s]+(.+)",
+        r"execute\s+(?:the\s+)?(.+)",
+        r"cmd\s+command[:\s]+(.+)",
+        r"`(.+?)`",
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, message, re.IGNORECASE)
+        if match:
+            return match.group(1).strip()
+    if "`" in message or "'" in message or '"' in message:
+        quoted = re.findall(r"`(.+?)`", message)
+        if quoted:
+            return quoted[0]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2_000)
+    args = parser.parse_args()
+
+    intents = json.loads((ROOT / "vera_data" / "vera_commands.json").read_text(encoding="utf-8"))["intents"]
+    matcher = vera.IntentMatcher(intents)
+
+    for message in CORPUS:
+        before = (legacy_is_command_request(message), legacy_parse_command(message))
+        after = matcher.classify(message)
+        if before != after:
+            print(f"differs  {message!r}: legacy {before} -> matcher {after}")
+
+    total = args.rounds * len(CORPUS)
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for message in CORPUS:
+            legacy_is_command_request(message)
+            legacy_parse_command(message)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for message in CORPUS:
+            matcher.classify(message)
+    compiled = time.perf_counter() - start
+
+    print(f"legacy   {total / legacy:>12,.0f} msgs/s ({legacy / total * 1e6:.2f} us/msg)")
+    print(f"matcher  {total / compiled:>12,.0f} msgs/s ({compiled / total * 1e6:.2f} us/msg)")
+
+
+if __name__ == "__main__":
+    main()
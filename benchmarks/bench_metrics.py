@@ -0,0 +1,54 @@
+"""
+bench_metrics.py - Cost of the /metrics instrumentation on the hot path
+Times Histogram.observe() on its own, a cached firewall check (the
+cheapest instrumented call) against the same check with the histogram
+replaced by a no-op, and one full render of the registry as a scrape.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import vera
+
+N = 200_000
+
+
+class NoHistogram:
+    def observe(self, value):
+        pass
+
+
+def per_call_ns(fn, n: int = N) -> float:
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter_ns() - start) / n
+
+
+def main():
+    histogram = vera.Histogram("bench_seconds", "bench", vera.LATENCY_BUCKETS)
+    observe = per_call_ns(lambda: histogram.observe(0.3))
+
+    lds = vera.LDSManager(datadir=str(ROOT / "vera_data"))
+    firewall = vera.VERAFirewall(lds.firewall)
+    check = lambda: firewall.is_command_safe("git status")
+    check()  # Warm the verdict cache
+    instrumented = per_call_ns(check)
+    real, vera.FIREWALL_SECONDS = vera.FIREWALL_SECONDS, NoHistogram()
+    try:
+        bare = per_call_ns(check)
+    finally:
+        vera.FIREWALL_SECONDS = real
+
+    render = per_call_ns(vera.METRICS.render, 2_000) / 1000
+    print(f"[BENCH] Histogram.observe:          {observe:8.0f} ns")
+    print(f"[BENCH] Cached firewall check:      {bare:8.0f} ns bare, {instrumented:.0f} ns instrumented")
+    print(f"[BENCH] /metrics render:            {render:8.1f} us ({len(vera.METRICS.series)} series)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+bench_similarity.py - Build and query time of the ILE near-duplicate index
+Indexes synthetic user questions and times bulk build, incremental add
+and query latency.
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ile.similarity import MinHashIndex, NUM_BINS
+
+TEMPLATES = [
+    "how do I {verb} the {noun} on {os}",
+    "what does the {noun} {verb} command do",
+    "can you {verb} my {noun} please",
+    "why does {noun} fail to {verb} after update {n}",
+    "show me how to {verb} {noun} logs from yesterday",
+]
+VERBS = ["restart", "stop", "list", "check", "configure", "delete", "install", "update", "monitor", "backup"]
+NOUNS = ["nginx", "firewall", "disk", "network adapter", "service", "docker container",
+         "user account", "cron job", "kernel module", "database", "ssh key", "printer"]
+SYSTEMS = ["windows", "ubuntu", "kali", "debian", "centos"]
+
+
+def questions(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield i + 1, rng.choice(TEMPLATES).format(
+            verb=rng.choice(VERBS), noun=rng.choice(NOUNS), os=rng.choice(SYSTEMS), n=rng.randint(1, 99999)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    index = MinHashIndex()
+    start = time.perf_counter()
+    index.build(questions(args.rows))
+    build = time.perf_counter() - start
+    print(f"build        {args.rows} rows in {build:.1f}s ({build / args.rows * 1e6:.1f} us/row)")
+
+    extra = 10_000
+    start = time.perf_counter()
+    for item_id, text in questions(extra, seed=11):
+        index.add(args.rows + item_id, text)
+    added = time.perf_counter() - start
+    print(f"add          {extra} rows incrementally ({added / extra * 1e6:.1f} us/row incl. merges)")
+
+    memory = (index.ids.itemsize * len(index.ids)
+              + index.signatures.itemsize * len(index.signatures)
+              + sum(k.itemsize * len(k) + p.itemsize * len(p)
+                    for k, p in zip(index.band_keys, index.band_positions)))
+    print(f"memory       {memory / 2**20:.0f} MB in arrays ({NUM_BINS} bins/entry)")
+
+    probes = [text.replace("how do I", "how can I") for _, text in questions(args.queries, seed=3)]
+    samples, hits = [], 0
+    for text in probes:
+        start = time.perf_counter()
+        found = index.query(text, threshold=args.threshold)
+        samples.append(time.perf_counter() - start)
+        hits += bool(found)
+    samples.sort()
+    print(f"query        p50 {statistics.median(samples) * 1e6:.0f} us  "
+          f"p99 {samples[int(len(samples) * 0.99) - 1] * 1e6:.0f} us  "
+          f"({hits}/{len(probes)} found a near-duplicate >= {args.threshold})")
+
+
+if __name__ == "__main__":
+    main()
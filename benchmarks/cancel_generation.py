@@ -0,0 +1,94 @@
+"""
+cancel_generation.py - Check that stopped generations free Ollama at once
+Starts a long answer against the fake Ollama and ends it three ways: a
+{"type": "stop"} message, a newer message superseding it, and the client
+disconnecting. Each time the upstream stream must close within a few
+token intervals, and no generation slot may be left held at the end.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_ollama import FakeOllama
+
+TOKEN_INTERVAL = 0.02
+
+
+async def until_complete(ws) -> dict:
+    async for raw in ws:
+        data = json.loads(raw)
+        if data.get("type") in ("chat_complete", "error"):
+            return data
+
+
+async def closed(fake, disconnects: int, start: float) -> float:
+    """Seconds from start until the fake saw one more stream abandoned"""
+    while fake.disconnects <= disconnects:
+        await asyncio.sleep(0.001)
+    return time.perf_counter() - start
+
+
+async def run():
+    import websockets
+    import vera
+
+    fake = await FakeOllama(tokens=500, token_interval=TOKEN_INTERVAL).start()
+    vera.PerfConfig.OLLAMA_HOST = fake.url
+    core = vera.VERACore(fake.model, vera.LDSManager(datadir=str(ROOT / "vera_data")))
+    webserver = vera.WebServer(core)
+    await webserver.start()
+
+    results = {}
+    async with websockets.connect("ws://localhost:8766") as ws:
+        await ws.recv()
+
+        await ws.send(json.dumps({"message": "tell me a long story", "cache": False}))
+        await asyncio.sleep(0.3)
+        start, before = time.perf_counter(), fake.disconnects
+        await ws.send(json.dumps({"type": "stop"}))
+        done = await until_complete(ws)
+        results["stop"] = (await closed(fake, before, start), done.get("reason"))
+
+        await ws.send(json.dumps({"message": "another long story", "cache": False}))
+        await asyncio.sleep(0.3)
+        start, before = time.perf_counter(), fake.disconnects
+        await ws.send(json.dumps({"message": "never mind, a short one", "cache": False}))
+        done = await until_complete(ws)
+        results["supersede"] = (await closed(fake, before, start), done.get("reason"))
+        await ws.send(json.dumps({"type": "stop"}))
+        await until_complete(ws)
+
+        await ws.send(json.dumps({"message": "one more long story", "cache": False}))
+        await asyncio.sleep(0.3)
+        start, before = time.perf_counter(), fake.disconnects
+    results["disconnect"] = (await closed(fake, before, start), "disconnected")
+    for _ in range(100):
+        if not core.scheduler.active:
+            break
+        await asyncio.sleep(0.01)
+
+    await webserver.stop()
+    await fake.stop()
+
+    failed = False
+    for name, (elapsed, reason) in results.items():
+        print(f"[BENCH] {name:<10} ({reason}) upstream stream closed in {elapsed * 1000:6.1f}ms")
+        failed = failed or elapsed > TOKEN_INTERVAL * 5
+    print(f"[BENCH] Generation slots still held: {core.scheduler.active}")
+    failed = failed or core.scheduler.active > 0
+    if failed:
+        print("[BENCH] FAIL: a cancelled generation kept running")
+        return 1
+    print("[BENCH] OK: cancelled generations stopped immediately")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
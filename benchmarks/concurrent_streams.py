@@ -0,0 +1,68 @@
+"""
+concurrent_streams.py - Check that concurrent clients stream in parallel
+Runs WebServer against the fake Ollama and verifies that two clients'
+chat_chunk frames interleave instead of one waiting for the other.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_ollama import FakeOllama
+
+
+async def client(name: str, uri: str, events: list):
+    import websockets
+    async with websockets.connect(uri) as ws:
+        await ws.send(json.dumps({"message": f"hello from {name}"}))
+        async for raw in ws:
+            data = json.loads(raw)
+            if data.get("type") == "chat_chunk":
+                events.append((time.perf_counter(), name))
+            elif data.get("type") in ("chat_complete", "error"):
+                return data
+
+
+async def run():
+    fake = await FakeOllama(tokens=20, token_interval=0.02).start()
+    os.environ["OLLAMA_HOST"] = fake.url
+
+    import vera
+    vera.ILE_ENABLED = False
+    vera.PerfConfig.OLLAMA_HOST = fake.url
+    lds = vera.LDSManager(datadir=str(ROOT / "vera_data"))
+    webserver = vera.WebServer(vera.VERACore(fake.model, lds))
+    await webserver.start()
+
+    events = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        client("A", "ws://localhost:8766", events),
+        client("B", "ws://localhost:8766", events),
+    )
+    elapsed = time.perf_counter() - start
+    await fake.stop()
+
+    order = "".join(name for _, name in events)
+    switches = sum(1 for a, b in zip(order, order[1:]) if a != b)
+    print(f"[BENCH] Chunk order: {order}")
+    print(f"[BENCH] Client switches: {switches}, wall time {elapsed:.2f}s")
+    for result in results:
+        print(f"[BENCH] {result.get('type')}: {result.get('time', 0):.2f}s")
+
+    if switches < 2:
+        print("[BENCH] FAIL: streams were serialized")
+        return 1
+    print("[BENCH] OK: streams interleaved")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
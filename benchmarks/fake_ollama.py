@@ -0,0 +1,196 @@
+"""
+fake_ollama.py - Local stand-in for the Ollama HTTP API
+Streams canned tokens at a configurable rate so VERA can be exercised
+without a GPU or a real model. With load_delay set, the first request
+(and the first one after keep_alive runs out) waits for a simulated
+model load, like a real Ollama server does.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+
+class FakeOllama:
+    """Minimal Ollama server: /api/tags, /api/generate and streaming /api/chat"""
+
+    DEFAULT_KEEP_ALIVE = 300.0  # Ollama unloads an idle model after 5m
+
+    def __init__(self, model: str = "fake-model:latest", tokens: int = 20,
+                 token_interval: float = 0.01, ttft: float = 0.0, jitter: float = 0.0,
+                 load_delay: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.model = model
+        self.tokens = tokens
+        self.token_interval = token_interval
+        self.ttft = ttft
+        self.jitter = jitter
+        self.load_delay = load_delay
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.generate_requests = 0
+        self.active_streams = 0
+        self.disconnects = 0  # Streams the client closed before the last token
+        self.loads = 0
+        self.loaded_until = 0.0  # monotonic deadline; the model is resident until then
+        self.load_lock = asyncio.Lock()
+        self.runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _delay(self, base: float) -> float:
+        if self.jitter:
+            base += random.uniform(-self.jitter, self.jitter)
+        return max(base, 0.0)
+
+    @staticmethod
+    def _keep_alive(value) -> float:
+        """Seconds for an Ollama keep_alive value ("10m", "30s", 300, -1 = forever)"""
+        if value is None:
+            return FakeOllama.DEFAULT_KEEP_ALIVE
+        if isinstance(value, (int, float)):
+            seconds = float(value)
+        else:
+            units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+            text = str(value).strip()
+            unit = next((u for u in ("ms", "s", "m", "h") if text.endswith(u)), "")
+            seconds = float(text[:len(text) - len(unit)]) * units.get(unit, 1)
+        return float("inf") if seconds < 0 else seconds
+
+    async def _ensure_loaded(self, keep_alive) -> int:
+        """Simulate loading the model if it is not resident; returns load_duration in ns"""
+        async with self.load_lock:
+            start = time.perf_counter_ns()
+            if time.monotonic() >= self.loaded_until:
+                await asyncio.sleep(self.load_delay)
+                self.loads += 1
+            self.loaded_until = time.monotonic() + self._keep_alive(keep_alive)
+            return time.perf_counter_ns() - start
+
+    @property
+    def loaded(self) -> bool:
+        return time.monotonic() < self.loaded_until
+
+    def _part(self, content: str, done: bool = False, **extra) -> bytes:
+        part = {
+            "model": self.model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+            **extra,
+        }
+        return (json.dumps(part) + "\n").encode("utf-8")
+
+    async def handle_tags(self, request):
+        return web.json_response({"models": [{"model": self.model, "name": self.model}]})
+
+    async def handle_chat(self, request):
+        body = await request.json()
+        self.requests += 1
+        self.active_streams += 1
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        start = time.perf_counter_ns()
+        try:
+            load_duration = await self._ensure_loaded(body.get("keep_alive"))
+            await asyncio.sleep(self._delay(self.ttft))
+            first = time.perf_counter_ns()
+            for i in range(self.tokens):
+                await response.write(self._part(f"tok{i} "))
+                await asyncio.sleep(self._delay(self.token_interval))
+            end = time.perf_counter_ns()
+            await response.write(self._part(
+                "", done=True, done_reason="stop",
+                total_duration=end - start,
+                load_duration=load_duration,
+                prompt_eval_count=len(prompt.split()),
+                prompt_eval_duration=first - start,
+                eval_count=self.tokens,
+                eval_duration=end - first,
+            ))
+            await response.write_eof()
+        except ConnectionResetError:
+            self.disconnects += 1  # Client went away mid-stream, as a cancelled VERA request does
+        finally:
+            self.active_streams -= 1
+        return response
+
+    async def handle_generate(self, request):
+        """Non-streaming /api/generate; an empty prompt only loads the model"""
+        body = await request.json()
+        self.generate_requests += 1
+        start = time.perf_counter_ns()
+        load_duration = await self._ensure_loaded(body.get("keep_alive"))
+        prompt = body.get("prompt") or ""
+        text = ""
+        if prompt:
+            await asyncio.sleep(self._delay(self.ttft) + self.tokens * self.token_interval)
+            text = "".join(f"tok{i} " for i in range(self.tokens))
+        return web.json_response({
+            "model": self.model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "response": text,
+            "done": True,
+            "done_reason": "stop" if prompt else "load",
+            "total_duration": time.perf_counter_ns() - start,
+            "load_duration": load_duration,
+            "eval_count": self.tokens if prompt else 0,
+        })
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/api/tags", self.handle_tags)
+        app.router.add_post("/api/chat", self.handle_chat)
+        app.router.add_post("/api/generate", self.handle_generate)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+async def _serve(args):
+    fake = await FakeOllama(
+        tokens=args.tokens, token_interval=args.token_interval,
+        ttft=args.ttft, jitter=args.jitter, load_delay=args.load_delay, port=args.port,
+    ).start()
+    print(f"[FAKE] Ollama stand-in on {fake.url} (export OLLAMA_HOST={fake.url})")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await fake.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for VERA benchmarks")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--tokens", type=int, default=20)
+    parser.add_argument("--token-interval", type=float, default=0.01)
+    parser.add_argument("--ttft", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--load-delay", type=float, default=0.0,
+                        help="seconds a (re)load of the model takes")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
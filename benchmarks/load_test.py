@@ -0,0 +1,225 @@
+"""
+load_test.py - Throughput and latency of WebServer under concurrent clients
+Runs WebServer against the fake Ollama (token rate, TTFT and jitter are
+configurable), drives N websocket clients that each send M chat messages
+back to back, and reports p50/p95/p99 time to first token, inter-token
+latency, messages/s and event-loop lag. The coalescer sends several tokens
+per chat_chunk frame, so each frame's gap is split over the tokens it
+carries (the fake emits one word per token); the result tracks decode
+speed whatever --flush-ms is, while frames/message shows its effect.
+
+Server, fake Ollama and clients share one process and event loop, so the
+numbers are for comparing changes on the same machine, not for capacity:
+save a baseline with --save, then check a change with --compare.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_ollama import FakeOllama
+
+LAG_INTERVAL = 0.01  # Seconds between event-loop lag probes
+
+# Compared against a baseline: name -> True if higher is better
+COMPARED = {
+    "messages_per_sec": True,
+    "tokens_per_sec": True,
+    "ttft_ms.p50": False,
+    "ttft_ms.p95": False,
+    "ttft_ms.p99": False,
+    "itl_ms.p50": False,
+    "itl_ms.p95": False,
+    "itl_ms.p99": False,
+    "loop_lag_ms.p95": False,
+    "loop_lag_ms.p99": False,
+}
+
+
+def percentiles(samples: list) -> dict:
+    """Nearest-rank p50/p95/p99 and max, in milliseconds"""
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered))) - 1))]
+    return {
+        "p50": round(rank(0.50) * 1000, 3),
+        "p95": round(rank(0.95) * 1000, 3),
+        "p99": round(rank(0.99) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def client(url: str, cid: int, messages: int, stats: dict):
+    import websockets
+    async with websockets.connect(url, max_size=2**22) as ws:
+        await ws.recv()  # Session frame
+        for i in range(messages):
+            sent = time.perf_counter()
+            last = None
+            await ws.send(json.dumps({"message": f"load test {cid}-{i}", "cache": False}))
+            async for raw in ws:
+                data = json.loads(raw)
+                kind = data.get("type")
+                if kind == "chat_chunk":
+                    now = time.perf_counter()
+                    if last is None:
+                        stats["ttft"].append(now - sent)  # The coalescer sends the first token alone
+                    else:
+                        tokens = max(len(data["chunk"].split()), 1)
+                        stats["itl"].extend([(now - last) / tokens] * tokens)
+                    last = now
+                elif kind == "chat_complete":
+                    stats["completed"] += 1
+                    stats["tokens"] += data.get("tokens", 0)
+                    stats["frames"] += data.get("frames", 0)
+                    break
+                elif kind == "error":
+                    stats["errors"] += 1
+                    break
+
+
+async def probe_lag(samples: list, stop: asyncio.Event):
+    """How late the loop wakes a LAG_INTERVAL sleep: time other callbacks held it"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_INTERVAL)
+        samples.append(max(time.perf_counter() - start - LAG_INTERVAL, 0.0))
+
+
+async def run(args) -> dict:
+    import vera
+
+    fake = await FakeOllama(tokens=args.tokens, token_interval=args.token_interval,
+                            ttft=args.ttft, jitter=args.jitter).start()
+    vera.PerfConfig.OLLAMA_HOST = fake.url
+    vera.PerfConfig.CHUNK_FLUSH_MS = args.flush_ms
+    lds = vera.LDSManager(datadir=str(ROOT / "vera_data"))
+
+    memory = None
+    if args.ile:
+        from ile import ExperienceManager
+        memory = ExperienceManager(db_path=os.path.join(tempfile.mkdtemp(), "load_test.db"))
+        memory.start_session(user_name="load_test")
+    core = vera.VERACore(fake.model, lds, memory)
+    core.scheduler = vera.GenerationScheduler(args.max_generations, args.queue_size)
+    webserver = vera.WebServer(core, host="127.0.0.1", ws_port=0, http_port=0)
+    await webserver.start()
+
+    stats = {"ttft": [], "itl": [], "tokens": 0, "frames": 0, "completed": 0, "errors": 0}
+    lag = []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe_lag(lag, stop))
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client(webserver.ws_url, cid, args.messages, stats)
+                               for cid in range(args.clients)))
+        wall = time.perf_counter() - start
+    finally:
+        stop.set()
+        await prober
+        await webserver.stop()
+        await fake.stop()
+        if memory is not None:
+            memory.close()
+
+    return {
+        "config": {
+            "clients": args.clients, "messages": args.messages, "tokens": args.tokens,
+            "token_interval": args.token_interval, "ttft": args.ttft, "jitter": args.jitter,
+            "max_generations": args.max_generations, "queue_size": args.queue_size,
+            "flush_ms": args.flush_ms, "ile": args.ile,
+        },
+        "completed": stats["completed"],
+        "errors": stats["errors"],
+        "wall_time": round(wall, 3),
+        "messages_per_sec": round(stats["completed"] / wall, 2),
+        "tokens_per_sec": round(stats["tokens"] / wall, 1),
+        "frames_per_message": round(stats["frames"] / max(stats["completed"], 1), 1),
+        "ttft_ms": percentiles(stats["ttft"]),
+        "itl_ms": percentiles(stats["itl"]),
+        "loop_lag_ms": percentiles(lag),
+    }
+
+
+def metric(results: dict, name: str) -> float:
+    value = results
+    for key in name.split("."):
+        value = value[key]
+    return value
+
+
+def report(results: dict):
+    print(f"[BENCH] {results['completed']} messages in {results['wall_time']:.2f}s, "
+          f"{results['errors']} errors: {results['messages_per_sec']:.1f} msg/s, "
+          f"{results['tokens_per_sec']:.0f} tokens/s, "
+          f"{results['frames_per_message']:.1f} chat_chunk frames/message")
+    for name in ("ttft_ms", "itl_ms", "loop_lag_ms"):
+        p = results[name]
+        print(f"[BENCH] {name:12s} p50 {p['p50']:8.2f}  p95 {p['p95']:8.2f}  "
+              f"p99 {p['p99']:8.2f}  max {p['max']:8.2f}")
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the change per metric; False if any regressed by more than tolerance"""
+    if baseline.get("config") != results["config"]:
+        print(f"[BENCH] Warning: baseline config differs: {baseline.get('config')}")
+    ok = True
+    for name, higher_is_better in COMPARED.items():
+        old, new = metric(baseline, name), metric(results, name)
+        change = (new - old) / old if old else 0.0
+        worse = -change if higher_is_better else change
+        regressed = worse > tolerance
+        ok = ok and not regressed
+        print(f"[BENCH] {name:18s} {old:10.2f} -> {new:10.2f}  {change:+7.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    import vera
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--messages", type=int, default=5, help="messages per client")
+    parser.add_argument("--tokens", type=int, default=50, help="tokens per response")
+    parser.add_argument("--token-interval", type=float, default=0.01)
+    parser.add_argument("--ttft", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--max-generations", type=int, default=vera.PerfConfig.MAX_CONCURRENT_GENERATIONS)
+    parser.add_argument("--queue-size", type=int, default=vera.PerfConfig.GENERATION_QUEUE_SIZE)
+    parser.add_argument("--flush-ms", type=float, default=vera.PerfConfig.CHUNK_FLUSH_MS)
+    parser.add_argument("--ile", action="store_true", help="store interactions in a temporary ILE database")
+    parser.add_argument("--save", metavar="FILE", help="write results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="allowed regression per metric (fraction, default 0.10)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report(results)
+
+    ok = results["errors"] == 0 and results["completed"] == args.clients * args.messages
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"[BENCH] Baseline saved to {args.save}")
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        ok = compare(results, baseline, args.tolerance) and ok
+    print("[BENCH] OK" if ok else "[BENCH] FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
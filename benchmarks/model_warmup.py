@@ -0,0 +1,84 @@
+"""
+model_warmup.py - Check that ModelWarmer hides the model load from users
+Runs WebServer against a fake Ollama whose model takes LOAD_DELAY seconds
+to load and unloads after KEEP_ALIVE seconds, then measures time to first
+token for the first message, after an idle period longer than keep-alive
+with a client connected, and after reconnecting once the model unloaded.
+"""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_ollama import FakeOllama
+
+LOAD_DELAY = 1.0
+KEEP_ALIVE = 2.0
+
+
+async def first_token(ws, message: str) -> float:
+    start = time.perf_counter()
+    await ws.send(json.dumps({"message": message, "cache": False}))
+    ttft = None
+    async for raw in ws:
+        data = json.loads(raw)
+        if data.get("type") == "chat_chunk" and ttft is None:
+            ttft = time.perf_counter() - start
+        elif data.get("type") in ("chat_complete", "error"):
+            return ttft if ttft is not None else float("inf")
+
+
+async def run():
+    import websockets
+    import vera
+
+    fake = await FakeOllama(tokens=3, token_interval=0.01, load_delay=LOAD_DELAY).start()
+    vera.PerfConfig.OLLAMA_HOST = fake.url
+    vera.PerfConfig.KEEP_ALIVE = f"{KEEP_ALIVE:g}s"
+    lds = vera.LDSManager(datadir=str(ROOT / "vera_data"))
+    core = vera.VERACore(fake.model, lds)
+    core.warmer.refresh = KEEP_ALIVE / 2
+    webserver = vera.WebServer(core)
+    await webserver.start()
+
+    core.warmer.ensure_warm()
+    keeper = asyncio.create_task(core.warmer.keep_warm(lambda: bool(webserver.clients)))
+    await asyncio.sleep(LOAD_DELAY * 1.2)
+
+    results = {}
+    async with websockets.connect("ws://localhost:8766") as ws:
+        await ws.recv()
+        results["first message"] = await first_token(ws, "hello")
+        await asyncio.sleep(KEEP_ALIVE * 1.75)
+        results["idle, connected"] = await first_token(ws, "still there?")
+
+    await asyncio.sleep(KEEP_ALIVE * 1.5)
+    async with websockets.connect("ws://localhost:8766") as ws:
+        await ws.recv()
+        await asyncio.sleep(LOAD_DELAY * 1.2)
+        results["after reconnect"] = await first_token(ws, "back again")
+
+    keeper.cancel()
+    await webserver.stop()
+    await fake.stop()
+
+    for name, ttft in results.items():
+        print(f"[BENCH] {name:<16} first token in {ttft * 1000:7.1f}ms")
+    print(f"[BENCH] Model loads: {fake.loads}, warm-up requests: {fake.generate_requests}")
+
+    slow = [name for name, ttft in results.items() if ttft >= LOAD_DELAY / 2]
+    if slow:
+        print(f"[BENCH] FAIL: model load visible to users ({', '.join(slow)})")
+        return 1
+    print("[BENCH] OK: no message waited for a model load")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(run()))
@@ -0,0 +1,90 @@
+"""
+static_gui.py - Reconnect storm against the GUI route
+Compares the old per-request disk read with StaticFiles: N clients fetch
+"/" concurrently, then revalidate with the ETag they were given, as a
+browser does on reload. Reports requests/s, bytes sent and disk loads.
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+CLIENTS = 50
+ROUNDS = 20
+GUI = ROOT / "vera_interface_v2.html"
+
+
+async def from_disk(request):
+    """The previous serve_gui: open and read the file on every request"""
+    from aiohttp import web
+    with open(GUI, "r", encoding="utf-8") as f:
+        content = f.read()
+    return web.Response(text=content, content_type="text/html")
+
+
+async def storm(session, url: str, revalidate: bool):
+    sent = 0
+    statuses = {}
+    etag = None
+
+    async def one():
+        nonlocal sent, etag
+        headers = {"Accept-Encoding": "gzip, br"}
+        if revalidate and etag:
+            headers["If-None-Match"] = etag
+        async with session.get(url, headers=headers) as r:
+            body = await r.read()
+            sent += len(body)
+            statuses[r.status] = statuses.get(r.status, 0) + 1
+            etag = r.headers.get("ETag", etag)
+
+    await one()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await asyncio.gather(*(one() for _ in range(CLIENTS)))
+    elapsed = time.perf_counter() - start
+    return CLIENTS * ROUNDS / elapsed, sent, statuses
+
+
+async def run():
+    import aiohttp
+    from aiohttp import web
+    import vera
+
+    vera.require_module("web")
+    static = vera.StaticFiles()
+    static.add("/", str(GUI))
+    app = web.Application()
+    app.router.add_get("/disk", from_disk)
+    app.router.add_get("/", lambda request: static.respond(request, "/"))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    ok = True
+    async with aiohttp.ClientSession(auto_decompress=False) as session:
+        for label, path, revalidate in (("disk read per request", "/disk", False),
+                                        ("in memory, compressed", "/", False),
+                                        ("in memory, revalidated", "/", True)):
+            rate, sent, statuses = await storm(session, base + path, revalidate)
+            ok = ok and set(statuses) <= {200, 304}
+            print(f"[BENCH] {label:24s} {rate:8.0f} req/s  {sent / 1024:9.1f} KiB sent  {statuses}")
+    print(f"[BENCH] StaticFiles: {static.stats()}")
+    await runner.cleanup()
+    return ok and static.loads == 1
+
+
+def main():
+    ok = asyncio.run(run())
+    print("[BENCH] OK: GUI read from disk once" if ok else "[BENCH] FAIL: GUI errors or reloaded from disk")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,5 +7,7 @@ __version__ = "0.1.0"
 
 from .database import VERADatabase
 from .experience_manager import ExperienceManager
+from .schema import SCHEMA_VERSION, migrate
+from .similarity import MinHashIndex
 
-__all__ = ["VERADatabase", "ExperienceManager"]
+__all__ = ["VERADatabase", "ExperienceManager", "SCHEMA_VERSION", "migrate", "MinHashIndex"]
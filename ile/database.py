@@ -2,7 +2,8 @@ import os
 import sqlite3
 from pathlib import Path
 
-SCHEMA_FILE = Path(__file__).with_name("schema.sql")
+from .schema import migrate
+
 DB_PATH = Path("vera_data") / "experiences.db"
 
 
@@ -24,16 +25,9 @@ class VERADatabase:
         self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
 
-        # Load and execute schema
-        if SCHEMA_FILE.exists():
-            with open(SCHEMA_FILE, "r", encoding="utf-8") as f:
-                schema_sql = f.read()
-                self.conn.executescript(schema_sql)
-            self.conn.commit()
-            print(f"[ILE] Database initialized: {self.db_path}")
-        else:
-            print(f"[ILE] WARNING: schema.sql not found at {SCHEMA_FILE}")
-            print("[ILE] Database will be incomplete")
+        # Create or upgrade the schema
+        version = migrate(self.conn)
+        print(f"[ILE] Database initialized: {self.db_path} (schema v{version})")
 
     def execute(self, query: str, params: tuple | None = None):
         """Execute query and commit."""
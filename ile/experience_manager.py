@@ -5,84 +5,180 @@ Handles storing and retrieving user interactions
 
 import sqlite3
 import json
+import queue
+import re
+import time
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Callable, Optional, Dict, List
 import uuid
 import threading
 
+from .schema import migrate
+from .similarity import MinHashIndex, question_key
+
+# Write-behind batching: interactions are queued and committed by a
+# background writer once WRITE_BATCH_SIZE rows are pending or
+# WRITE_BATCH_INTERVAL seconds have passed since the first one
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_INTERVAL = 0.5
+
+_FLUSH = object()  # Queue marker: commit what is pending now
+_STOP = object()  # Queue marker: commit what is pending and exit
+
+# Connection tuning: WAL lets readers run alongside the writer and
+# synchronous=NORMAL only fsyncs at checkpoints, which is safe in WAL mode
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # 16 MB page cache
+    "PRAGMA temp_store=MEMORY",
+)
+
+# Statements are kept as constants so sqlite3's statement cache reuses the
+# prepared form instead of recompiling the SQL on every call
+INSERT_SESSION = '''
+    INSERT INTO sessions (id, start_time, user_name, interaction_count)
+    VALUES (?, ?, ?, ?)
+'''
+# Generation statistics stored with an interaction (migration 003)
+METRIC_COLUMNS = ("prompt_tokens", "completion_tokens", "prompt_eval_time", "eval_time", "load_time", "ttft")
+
+INSERT_EXPERIENCE = '''
+    INSERT INTO experiences 
+    (session_id, timestamp, user_input, vera_response, response_length, 
+     confidence_score, vera_reflection, domain, opening,
+     prompt_tokens, completion_tokens, prompt_eval_time, eval_time, load_time, ttft,
+     question_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+UPDATE_SESSION_COUNT = '''
+    UPDATE sessions 
+    SET interaction_count = interaction_count + ?
+    WHERE id = ?
+'''
+END_SESSION = '''
+    UPDATE sessions
+    SET end_time = ?
+    WHERE id = ?
+'''
+COUNT_EXPERIENCES = 'SELECT COUNT(*) FROM experiences'
+SEARCH_EXPERIENCES = '''
+    SELECT e.*, bm25(experiences_fts) AS rank
+    FROM experiences_fts
+    JOIN experiences e ON e.id = experiences_fts.rowid
+    WHERE experiences_fts MATCH ?
+    ORDER BY rank
+    LIMIT ?
+'''
+SEARCH_SESSION_EXPERIENCES = '''
+    SELECT e.*, bm25(experiences_fts) AS rank
+    FROM experiences_fts
+    JOIN experiences e ON e.id = experiences_fts.rowid
+    WHERE experiences_fts MATCH ? AND e.session_id = ?
+    ORDER BY rank
+    LIMIT ?
+'''
+GET_EXPERIENCE = 'SELECT * FROM experiences WHERE id = ?'
+MAX_EXPERIENCE_ID = 'SELECT COALESCE(MAX(id), 0) FROM experiences'
+SIMILARITY_SOURCE = 'SELECT id, user_input FROM experiences WHERE id <= ?'
+RECENT_EXPERIENCES = '''
+    SELECT * FROM experiences
+    ORDER BY id DESC
+    LIMIT ?
+'''
+RECENT_OPENING_EXPERIENCES = '''
+    SELECT * FROM experiences
+    WHERE opening = 1
+    ORDER BY id DESC
+    LIMIT ?
+'''
+SAME_QUESTION_EXPERIENCES = '''
+    SELECT * FROM experiences
+    WHERE question_key = ?
+    ORDER BY id DESC
+    LIMIT ?
+'''
+
+
 class ExperienceManager:
     """Manages persistent memory of interactions"""
     
-    def __init__(self, db_path: str = "vera_data/experiences.db"):
+    def __init__(self, db_path: str = "vera_data/experiences.db",
+                 batch_size: int = WRITE_BATCH_SIZE,
+                 batch_interval: float = WRITE_BATCH_INTERVAL):
         """Initialize the experience manager"""
         self.db_path = db_path
         self.session_id = None
         self.connection = None
         self.lock = threading.Lock()
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._queue = queue.Queue()
+        self._writer = None
+        self.on_write = None  # Optional callback(seconds, rows) after each committed batch
+        
+        # Maintained counters: seeded once, then updated as interactions are
+        # queued so reading them never touches the database
+        self._count_lock = threading.Lock()
+        self._total_count = 0
+        self._session_count = 0
         
         # Create directory if needed
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         
         # Initialize database
         self._init_database()
+        self._seed_counters()
+        self.similarity = MinHashIndex()
+        self._start_similarity_build()
+        self._start_writer()
         print(f"[ILE] Database initialized: {self.db_path}")
     
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return the long-lived connection, opening and tuning it on first use"""
+        if self.connection is None:
+            self.connection = sqlite3.connect(
+                self.db_path,
+                timeout=5.0,
+                check_same_thread=False,  # Shared across threads, guarded by self.lock
+                cached_statements=128,
+            )
+            self.connection.row_factory = sqlite3.Row
+            for pragma in CONNECTION_PRAGMAS:
+                self.connection.execute(pragma)
+        return self.connection
+    
     def _init_database(self):
         """Initialize database with schema"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Create sessions table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sessions (
-                    id TEXT PRIMARY KEY,
-                    start_time TEXT NOT NULL,
-                    end_time TEXT,
-                    interaction_count INTEGER DEFAULT 0,
-                    user_name TEXT
-                )
-            ''')
-            
-            # Create experiences table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS experiences (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    session_id TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    user_input TEXT,
-                    vera_response TEXT,
-                    response_length INTEGER,
-                    confidence_score REAL,
-                    vera_reflection TEXT,
-                    domain TEXT,
-                    FOREIGN KEY(session_id) REFERENCES sessions(id)
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+            migrate(self._get_connection())
             return True
         except Exception as e:
             print(f"[ILE] Database init error: {e}")
             return False
     
+    def _seed_counters(self):
+        """Count stored experiences once at startup"""
+        try:
+            with self.lock:
+                self._total_count = self._get_connection().execute(COUNT_EXPERIENCES).fetchone()[0]
+        except Exception as e:
+            print(f"[ILE] Count error: {e}")
+            self._total_count = 0
+    
     def start_session(self, user_name: str = "VERA_User"):
         """Start a new session"""
         try:
             self.session_id = str(uuid.uuid4())[:8]
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO sessions (id, start_time, user_name, interaction_count)
-                VALUES (?, ?, ?, ?)
-            ''', (self.session_id, datetime.now().isoformat(), user_name, 0))
-            
-            conn.commit()
-            conn.close()
+            with self.lock:
+                conn = self._get_connection()
+                with conn:
+                    conn.execute(INSERT_SESSION,
+                                 (self.session_id, datetime.now().isoformat(), user_name, 0))
+            self._session_count = 0
             
             print(f"[ILE] ✓ Session started: {self.session_id}")
             return self.session_id
@@ -95,8 +191,10 @@ class ExperienceManager:
                          vera_response: str,
                          confidence: float = 0.75,
                          reflection: str = "",
-                         domain: Optional[str] = None) -> bool:
-        """Store a single interaction in the database
+                         domain: Optional[str] = None,
+                         metrics: Optional[Dict] = None,
+                         opening: Optional[bool] = None) -> bool:
+        """Queue a single interaction for the background writer
         
         Args:
             user_input: User's input message
@@ -104,132 +202,301 @@ class ExperienceManager:
             confidence: Confidence score (0-1)
             reflection: VERA's reflection on the response
             domain: Domain/category of interaction
+            metrics: Generation statistics keyed by METRIC_COLUMNS (others ignored)
+            opening: True if this was the first turn of its conversation;
+                opening turns are also stored under their question_key
             
         Returns:
-            True if stored successfully, False otherwise
+            True if queued for storage, False otherwise
         """
         if not self.session_id:
             print("[ILE] Error: No active session")
             return False
         
+        if self._writer is None:
+            print("[ILE] Error: Writer stopped")
+            return False
+        
+        # Queued for the background writer - the caller never waits on disk
+        self._queue.put((
+            self.session_id,
+            datetime.now().isoformat(),
+            user_input[:2000],  # Limit to 2000 chars
+            vera_response[:5000],  # Limit to 5000 chars
+            len(vera_response),
+            confidence,
+            reflection[:500],  # Limit to 500 chars
+            domain,
+            None if opening is None else int(opening),
+            *(metrics.get(column) if metrics else None for column in METRIC_COLUMNS),
+            (question_key(user_input[:2000]) or None) if opening else None
+        ))
+        with self._count_lock:
+            self._total_count += 1
+            self._session_count += 1
+        return True
+    
+    def flush(self):
+        """Block until every queued interaction is committed"""
+        if self._writer is not None:
+            self._queue.put(_FLUSH)
+            self._queue.join()
+    
+    def _start_writer(self):
+        """Start the background thread that commits queued interactions"""
+        self._writer = threading.Thread(target=self._writer_loop, name="ile-writer", daemon=True)
+        self._writer.start()
+    
+    def _writer_loop(self):
+        """Collect queued rows into batches and commit each in one transaction"""
+        running = True
+        while running:
+            item = self._queue.get()
+            batch = []
+            markers = 0
+            deadline = time.monotonic() + self.batch_interval
+            
+            while True:
+                if item is _STOP:
+                    running = False
+                    markers += 1
+                    break
+                if item is _FLUSH:
+                    markers += 1
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            
+            if batch:
+                self._write_batch(batch)
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+    
+    def _write_batch(self, batch: List[tuple]) -> bool:
+        """Insert a batch of rows and apply aggregated session counts"""
+        session_counts = Counter(row[0] for row in batch)
         try:
-            # Use threading lock to prevent concurrent writes
+            start_time = time.perf_counter()
             with self.lock:
-                conn = sqlite3.connect(self.db_path, timeout=5.0)
-                conn.isolation_level = None  # Autocommit mode
-                cursor = conn.cursor()
-                
-                # Insert experience
-                cursor.execute('''
-                    INSERT INTO experiences 
-                    (session_id, timestamp, user_input, vera_response, response_length, 
-                     confidence_score, vera_reflection, domain)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    self.session_id,
-                    datetime.now().isoformat(),
-                    user_input[:2000],  # Limit to 2000 chars
-                    vera_response[:5000],  # Limit to 5000 chars
-                    len(vera_response),
-                    confidence,
-                    reflection[:500],  # Limit to 500 chars
-                    domain
-                ))
-                
-                # Update session interaction count
-                cursor.execute('''
-                    UPDATE sessions 
-                    SET interaction_count = interaction_count + 1
-                    WHERE id = ?
-                ''', (self.session_id,))
-                
-                conn.close()
-                return True
-                
+                conn = self._get_connection()
+                with conn:  # One transaction for the whole batch
+                    row_ids = [conn.execute(INSERT_EXPERIENCE, row).lastrowid for row in batch]
+                    
+                    # Update session interaction counts, one statement per session
+                    conn.executemany(UPDATE_SESSION_COUNT,
+                                     [(count, sid) for sid, count in session_counts.items()])
+            
+            if self.on_write is not None:
+                try:
+                    self.on_write(time.perf_counter() - start_time, len(batch))
+                except Exception as e:
+                    print(f"[ILE] on_write callback error: {e}")  # The batch itself is committed
+            for row_id, row in zip(row_ids, batch):
+                self.similarity.add(row_id, row[2])
+            return True
+        
         except sqlite3.OperationalError as e:
-            print(f"[ILE] Database error (operational): {e}")
-            return False
+            print(f"[ILE] Database error (operational): {e} - {len(batch)} interactions lost")
         except sqlite3.IntegrityError as e:
-            print(f"[ILE] Database error (integrity): {e}")
-            return False
+            print(f"[ILE] Database error (integrity): {e} - {len(batch)} interactions lost")
         except Exception as e:
-            print(f"[ILE] Store error: {type(e).__name__}: {e}")
-            return False
+            print(f"[ILE] Store error: {type(e).__name__}: {e} - {len(batch)} interactions lost")
+        
+        # Take the lost rows back out of the counters
+        with self._count_lock:
+            self._total_count -= len(batch)
+            self._session_count -= session_counts.get(self.session_id, 0)
+        return False
+    
+    def _stop_writer(self):
+        """Commit everything still queued and stop the writer thread"""
+        if self._writer is None:
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._writer = None
     
     def get_total_count(self) -> int:
-        """Get total number of stored experiences"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM experiences')
-            count = cursor.fetchone()[0]
-            conn.close()
-            return count
-        except Exception as e:
-            print(f"[ILE] Count error: {e}")
-            return 0
+        """Get total number of stored experiences (maintained counter, O(1))"""
+        return self._total_count
     
     def get_session_count(self) -> int:
-        """Get interaction count for current session"""
+        """Get interaction count for current session (maintained counter, O(1))"""
         if not self.session_id:
             return 0
+        return self._session_count
+    
+    def get_recent_interactions(self, limit: int = 10, opening_only: bool = False) -> List[Dict]:
+        """Get recent interactions (opening_only: first turns of a conversation only)"""
+        try:
+            with self.lock:
+                rows = self._get_connection().execute(
+                    RECENT_OPENING_EXPERIENCES if opening_only else RECENT_EXPERIENCES, (limit,)
+                ).fetchall()
+            return [dict(row) for row in rows]
+        except Exception as e:
+            print(f"[ILE] Fetch error: {e}")
+            return []
+    
+    def _start_similarity_build(self):
+        """Index existing user inputs in the background
         
+        Rows up to the current max id are loaded by the build thread; every
+        later row is added by the writer, so nothing is indexed twice.
+        """
+        self.similarity_ready = threading.Event()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT interaction_count FROM sessions WHERE id = ?', 
-                         (self.session_id,))
-            result = cursor.fetchone()
-            conn.close()
-            return result[0] if result else 0
+            with self.lock:
+                build_upto = self._get_connection().execute(MAX_EXPERIENCE_ID).fetchone()[0]
         except Exception as e:
-            print(f"[ILE] Session count error: {e}")
-            return 0
+            print(f"[ILE] Similarity index error: {e}")
+            self.similarity_ready.set()
+            return
+        
+        def build():
+            try:
+                start = time.perf_counter()
+                conn = sqlite3.connect(self.db_path, timeout=5.0)  # Own reader, WAL allows it
+                try:
+                    self.similarity.build(conn.execute(SIMILARITY_SOURCE, (build_upto,)))
+                finally:
+                    conn.close()
+                print(f"[ILE] Similarity index: {len(self.similarity)} inputs "
+                      f"in {time.perf_counter() - start:.2f}s")
+            except Exception as e:
+                print(f"[ILE] Similarity index error: {e}")
+            finally:
+                self.similarity_ready.set()
+        
+        if build_upto:
+            threading.Thread(target=build, name="ile-similarity", daemon=True).start()
+        else:
+            self.similarity_ready.set()
+    
+    def find_similar(self, text: str, threshold: float = 0.9, limit: int = 5) -> List[tuple]:
+        """Near-duplicate past user inputs as (experience id, similarity), best first
+        
+        Similarity is the estimated Jaccard overlap of character shingles;
+        use it to spot duplicate memories. High scores still separate
+        different questions ("root of 144" / "of 169"), so answers are only
+        reused through find_same_question().
+        """
+        return self.similarity.query(text, threshold, limit)
     
-    def get_recent_interactions(self, limit: int = 10) -> List[Dict]:
-        """Get recent interactions"""
+    def get_interaction(self, experience_id: int) -> Optional[Dict]:
+        """Fetch one stored interaction by id"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM experiences
-                ORDER BY id DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            results = [dict(row) for row in cursor.fetchall()]
-            conn.close()
-            return results
+            with self.lock:
+                row = self._get_connection().execute(GET_EXPERIENCE, (experience_id,)).fetchone()
+            return dict(row) if row else None
         except Exception as e:
             print(f"[ILE] Fetch error: {e}")
-            return []
+            return None
     
-    def close(self):
-        """Close session and cleanup"""
-        if not self.session_id:
-            return
+    def find_similar_interaction(self, text: str, threshold: float = 0.9,
+                                 accept: Optional[Callable[[Dict], bool]] = None) -> Optional[Dict]:
+        """Stored interaction whose input best matches text, with its "similarity"
+        
+        accept(row), if given, must also approve a candidate; the best
+        approved one is returned.
+        """
+        for experience_id, similarity in self.find_similar(text, threshold):
+            row = self.get_interaction(experience_id)
+            if row and row.get("vera_response") and (accept is None or accept(row)):
+                row["similarity"] = similarity
+                return row
+        return None
+    
+    def find_same_question(self, text: str, accept: Optional[Callable[[Dict], bool]] = None,
+                           limit: int = 8) -> Optional[Dict]:
+        """Latest opening interaction asking text in other words (same question_key)
         
+        An indexed lookup, unlike find_similar_interaction(): only case,
+        punctuation and filler words may differ. accept(row), if given, must
+        also approve the row; the newest approved one of the last limit is returned.
+        """
+        key = question_key(text)
+        if not key:
+            return None
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Mark session as ended
-            cursor.execute('''
-                UPDATE sessions
-                SET end_time = ?
-                WHERE id = ?
-            ''', (datetime.now().isoformat(), self.session_id))
-            
-            conn.commit()
-            conn.close()
+            with self.lock:
+                rows = self._get_connection().execute(SAME_QUESTION_EXPERIENCES, (key, limit)).fetchall()
+        except Exception as e:
+            print(f"[ILE] Lookup error: {e}")
+            return None
+        for row in map(dict, rows):
+            if row.get("vera_response") and (accept is None or accept(row)):
+                return row
+        return None
+    
+    def search(self, query: str, limit: int = 10, session: Optional[str] = None) -> List[Dict]:
+        """Full-text search over stored interactions, best matches first
+        
+        Args:
+            query: Free text; every word must appear in the input or response
+            limit: Maximum number of results
+            session: Restrict results to one session id
             
-            print(f"[ILE] Session ended: {self.session_id}")
+        Returns:
+            Matching experience rows (with a bm25 "rank", lower is better)
+        """
+        # Quote each word so user text can never be parsed as FTS5 syntax
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"' for term in terms)
+        
+        # Commit queued interactions first so recent ones are searchable
+        self.flush()
+        
+        try:
+            with self.lock:
+                conn = self._get_connection()
+                if session:
+                    rows = conn.execute(SEARCH_SESSION_EXPERIENCES, (match, session, limit)).fetchall()
+                else:
+                    rows = conn.execute(SEARCH_EXPERIENCES, (match, limit)).fetchall()
+            return [dict(row) for row in rows]
         except Exception as e:
-            print(f"[ILE] Close error: {e}")
+            print(f"[ILE] Search error: {e}")
+            return []
+    
+    def close(self):
+        """Flush pending writes, close session and cleanup"""
+        self._stop_writer()
         
-        self.session_id = None
+        if self.session_id:
+            try:
+                # Mark session as ended
+                with self.lock:
+                    conn = self._get_connection()
+                    with conn:
+                        conn.execute(END_SESSION, (datetime.now().isoformat(), self.session_id))
+                
+                print(f"[ILE] Session ended: {self.session_id}")
+            except Exception as e:
+                print(f"[ILE] Close error: {e}")
+            
+            self.session_id = None
+        
+        with self.lock:
+            if self.connection is not None:
+                try:
+                    # Fold the WAL back into the database file so the data is durable
+                    self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error as e:
+                    print(f"[ILE] Checkpoint error: {e}")
+                self.connection.close()
+                self.connection = None
     
     def __del__(self):
         """Cleanup on deletion"""
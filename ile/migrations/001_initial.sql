@@ -1,6 +1,8 @@
 -- V.E.R.A ILE Database Schema - Phase 1
 -- Persistent memory foundation for VERA
 -- Created: 2026-01-12
+-- Migration 001: baseline tables and indices. Uses IF NOT EXISTS so
+-- databases created before versioning are adopted and gain the indices.
 
 -- ============================================================================
 -- SESSIONS: Track user sessions
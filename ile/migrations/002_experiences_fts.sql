@@ -0,0 +1,40 @@
+-- V.E.R.A ILE Database Schema - Migration 002
+-- Full-text search over stored experiences (FTS5, external content)
+
+-- ============================================================================
+-- EXPERIENCES_FTS: Index of user_input / vera_response, rowid = experiences.id
+-- ============================================================================
+
+CREATE VIRTUAL TABLE IF NOT EXISTS experiences_fts USING fts5(
+    user_input,
+    vera_response,
+    content='experiences',
+    content_rowid='id'
+);
+
+-- ============================================================================
+-- TRIGGERS: Keep the index in sync with the experiences table
+-- ============================================================================
+
+CREATE TRIGGER IF NOT EXISTS experiences_fts_insert AFTER INSERT ON experiences BEGIN
+    INSERT INTO experiences_fts(rowid, user_input, vera_response)
+    VALUES (new.id, new.user_input, new.vera_response);
+END;
+
+CREATE TRIGGER IF NOT EXISTS experiences_fts_delete AFTER DELETE ON experiences BEGIN
+    INSERT INTO experiences_fts(experiences_fts, rowid, user_input, vera_response)
+    VALUES ('delete', old.id, old.user_input, old.vera_response);
+END;
+
+CREATE TRIGGER IF NOT EXISTS experiences_fts_update AFTER UPDATE ON experiences BEGIN
+    INSERT INTO experiences_fts(experiences_fts, rowid, user_input, vera_response)
+    VALUES ('delete', old.id, old.user_input, old.vera_response);
+    INSERT INTO experiences_fts(rowid, user_input, vera_response)
+    VALUES (new.id, new.user_input, new.vera_response);
+END;
+
+-- ============================================================================
+-- BACKFILL: Index rows stored before this migration
+-- ============================================================================
+
+INSERT INTO experiences_fts(experiences_fts) VALUES ('rebuild');
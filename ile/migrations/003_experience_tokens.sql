@@ -0,0 +1,13 @@
+-- V.E.R.A ILE Database Schema - Migration 003
+-- Token accounting per interaction, from Ollama's final stream chunk
+
+-- ============================================================================
+-- EXPERIENCES: Generation statistics (NULL for cached / LDS answers)
+-- ============================================================================
+
+ALTER TABLE experiences ADD COLUMN prompt_tokens INTEGER;      -- prompt_eval_count
+ALTER TABLE experiences ADD COLUMN completion_tokens INTEGER;  -- eval_count
+ALTER TABLE experiences ADD COLUMN prompt_eval_time REAL;      -- Prefill seconds
+ALTER TABLE experiences ADD COLUMN eval_time REAL;             -- Decode seconds
+ALTER TABLE experiences ADD COLUMN load_time REAL;             -- Model load seconds
+ALTER TABLE experiences ADD COLUMN ttft REAL;                  -- Seconds to first token, queueing included
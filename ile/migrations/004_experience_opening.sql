@@ -0,0 +1,10 @@
+-- V.E.R.A ILE Database Schema - Migration 004
+-- Mark interactions that opened their conversation
+
+-- ============================================================================
+-- EXPERIENCES: opening = 1 for the first turn of a conversation, 0 for a
+-- follow-up whose answer depends on earlier turns, NULL if stored before
+-- this migration (unknown - never replayed)
+-- ============================================================================
+
+ALTER TABLE experiences ADD COLUMN opening INTEGER;
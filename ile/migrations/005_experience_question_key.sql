@@ -0,0 +1,12 @@
+-- V.E.R.A ILE Database Schema - Migration 005
+-- Canonical question text for reusing answers to reworded questions
+
+-- ============================================================================
+-- EXPERIENCES: question_key = similarity.question_key(user_input) for
+-- opening turns (NULL otherwise, and for rows stored before this migration)
+-- ============================================================================
+
+ALTER TABLE experiences ADD COLUMN question_key TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_experiences_question_key
+    ON experiences(question_key) WHERE question_key IS NOT NULL;
@@ -0,0 +1,58 @@
+"""
+ILE schema migrations
+Single source of the ILE database schema, shared by VERADatabase and
+ExperienceManager. Each file in migrations/ is named NNN_description.sql
+and is applied once, in order; PRAGMA user_version records the last
+version applied so existing databases are upgraded in place.
+"""
+
+import sqlite3
+from pathlib import Path
+from typing import List, Tuple
+
+MIGRATIONS_DIR = Path(__file__).with_name("migrations")
+
+
+def load_migrations() -> List[Tuple[int, Path]]:
+    """Return (version, path) for every migration file, oldest first"""
+    migrations = []
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        prefix = path.name.split("_", 1)[0]
+        if prefix.isdigit():
+            migrations.append((int(prefix), path))
+    return sorted(migrations)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Schema version currently recorded in the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations; returns the resulting schema version
+    
+    Each migration runs in its own transaction together with the
+    user_version bump, so a failed step leaves the database at the
+    previous version and raises.
+    """
+    current = get_schema_version(conn)
+    
+    for version, path in load_migrations():
+        if version <= current:
+            continue
+        
+        sql = path.read_text(encoding="utf-8")
+        try:
+            conn.executescript(f"BEGIN;\n{sql}\nPRAGMA user_version = {version};\nCOMMIT;")
+        except sqlite3.Error:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        
+        current = version
+        print(f"[ILE] Schema migrated to version {version} ({path.stem})")
+    
+    return current
+
+
+SCHEMA_VERSION = max((version for version, _ in load_migrations()), default=0)
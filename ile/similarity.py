@@ -0,0 +1,185 @@
+"""
+ILE similarity index
+Near-duplicate detection over stored user inputs with MinHash + LSH.
+Signatures use one-permutation hashing (one pass over the shingles,
+empty bins densified from their neighbours) and live in flat arrays, so
+a million questions take about 160 MB and lookups take
+microseconds.
+"""
+
+import operator
+import re
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Iterable, List, Tuple
+
+NUM_BINS = 32  # Signature length (must be a power of two)
+BAND_ROWS = 4  # Bins per LSH band -> NUM_BINS // BAND_ROWS bands
+SHINGLE_SIZE = 3  # Character n-grams
+MAX_BUCKET_SCAN = 64  # Most recent entries taken per matching band
+MAX_VERIFY = 16  # Candidates (most shared bands first) compared bin by bin
+MERGE_MIN = 4096  # Pending band entries before merging into the sorted arrays
+
+_BIN_SHIFT = 32 - (NUM_BINS.bit_length() - 1)
+_EMPTY = 0x10000  # Larger than any 16-bit bin value
+_WORDS = re.compile(r"\w+")
+
+# Words that change how a question is asked, not what it asks. Question
+# words, negations ("not", the "t" of "can't") and numbers are never filler;
+# neither are "a" and "to", which name things in "copy a to b"
+FILLER_WORDS = frozenset((
+    "an", "the", "do", "does", "did", "can", "could", "would", "will",
+    "i", "me", "my", "you", "your", "we", "us", "our", "please", "is", "are",
+))
+
+
+def normalize(text: str) -> str:
+    """Lowercase, punctuation-free, single-spaced form of a message"""
+    return " ".join(_WORDS.findall(text.lower()))
+
+
+def question_key(text: str) -> str:
+    """Canonical form of a question: normalize() without filler words
+    
+    Content words keep their order, so "How can I restart nginx?" and "how do
+    i restart nginx" share a key while "copy a to b" and "copy b to a", or
+    "root of 144" and "root of 169", do not. "" if nothing but filler.
+    """
+    return " ".join(word for word in _WORDS.findall(text.lower()) if word not in FILLER_WORDS)
+
+
+def signature(text: str) -> List[int]:
+    """MinHash signature: NUM_BINS 16-bit values"""
+    text = normalize(text)
+    if len(text) < SHINGLE_SIZE:
+        text = text.ljust(SHINGLE_SIZE)
+    data = text.encode("utf-8")
+    
+    bins = [_EMPTY] * NUM_BINS
+    for i in range(len(data) - SHINGLE_SIZE + 1):
+        h = (zlib.crc32(data[i:i + SHINGLE_SIZE]) * 0x9E3779B1) & 0xFFFFFFFF
+        b = h >> _BIN_SHIFT
+        v = (h >> 8) & 0xFFFF
+        if v < bins[b]:
+            bins[b] = v
+    
+    # Densify: an empty bin borrows from the next filled bin to its right
+    if _EMPTY in bins:
+        for b in range(NUM_BINS):
+            if bins[b] == _EMPTY:
+                for step in range(1, NUM_BINS):
+                    v = bins[(b + step) % NUM_BINS]
+                    if v != _EMPTY:
+                        bins[b] = (v + step * 0x9E37) & 0xFFFF
+                        break
+    return bins
+
+
+def band_keys(sig: List[int]) -> List[int]:
+    """Pack each band of BAND_ROWS 16-bit values into one 64-bit key"""
+    keys = []
+    for start in range(0, NUM_BINS, BAND_ROWS):
+        key = 0
+        for v in sig[start:start + BAND_ROWS]:
+            key = (key << 16) | v
+        keys.append(key)
+    return keys
+
+
+class MinHashIndex:
+    """Incremental LSH index of (id, text) pairs, thread-safe"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = array("q")
+        self.signatures = array("H")  # NUM_BINS values per entry
+        bands = NUM_BINS // BAND_ROWS
+        # Per band: sorted keys with the matching entry positions, plus a
+        # small dict of recent additions merged in when it grows
+        self.band_keys = [array("Q") for _ in range(bands)]
+        self.band_positions = [array("i") for _ in range(bands)]
+        self.pending = [dict() for _ in range(bands)]
+        self.pending_count = 0
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def add(self, item_id: int, text: str):
+        """Index one entry"""
+        sig = signature(text)
+        keys = band_keys(sig)
+        with self.lock:
+            position = len(self.ids)
+            self.ids.append(item_id)
+            self.signatures.extend(sig)
+            for band, key in enumerate(keys):
+                self.pending[band].setdefault(key, []).append(position)
+            self.pending_count += 1
+            if self.pending_count >= max(MERGE_MIN, len(self.ids) // 4):
+                self._merge()
+    
+    def build(self, rows: Iterable[Tuple[int, str]]):
+        """Bulk-index (id, text) rows; much faster than repeated add()"""
+        ids = array("q")
+        sigs = array("H")
+        keys = [array("Q") for _ in self.band_keys]
+        for item_id, text in rows:
+            sig = signature(text or "")
+            ids.append(item_id)
+            sigs.extend(sig)
+            for band, key in enumerate(band_keys(sig)):
+                keys[band].append(key)
+        
+        with self.lock:
+            offset = len(self.ids)
+            self.ids.extend(ids)
+            self.signatures.extend(sigs)
+            for band, band_new in enumerate(keys):
+                for position, key in enumerate(band_new, offset):
+                    self.pending[band].setdefault(key, []).append(position)
+            self.pending_count += len(ids)
+            self._merge()
+    
+    def _merge(self):
+        """Fold pending entries into the sorted per-band arrays (lock held)"""
+        for band, pending in enumerate(self.pending):
+            if not pending:
+                continue
+            pairs = list(zip(self.band_keys[band], self.band_positions[band]))
+            for key, positions in pending.items():
+                pairs.extend((key, position) for position in positions)
+            pairs.sort()
+            self.band_keys[band] = array("Q", (key for key, _ in pairs))
+            self.band_positions[band] = array("i", (position for _, position in pairs))
+            pending.clear()
+        self.pending_count = 0
+    
+    def query(self, text: str, threshold: float = 0.8, limit: int = 5) -> List[Tuple[int, float]]:
+        """Entries whose estimated Jaccard similarity is >= threshold, best first"""
+        sig = signature(text)
+        keys = band_keys(sig)
+        candidates = Counter()
+        
+        with self.lock:
+            for band, key in enumerate(keys):
+                band_keys_ = self.band_keys[band]
+                hi = bisect_right(band_keys_, key)
+                lo = bisect_left(band_keys_, key, hi=hi)
+                positions = self.band_positions[band]
+                candidates.update(positions[max(lo, hi - MAX_BUCKET_SCAN):hi])
+                candidates.update(self.pending[band].get(key, ())[-MAX_BUCKET_SCAN:])
+            
+            # Entries sharing more bands are more similar; verify those first
+            results = []
+            sigs = self.signatures
+            for position, _ in candidates.most_common(MAX_VERIFY):
+                start = position * NUM_BINS
+                score = sum(map(operator.eq, sig, sigs[start:start + NUM_BINS])) / NUM_BINS
+                if score >= threshold:
+                    results.append((self.ids[position], score))
+        
+        results.sort(key=lambda item: (-item[1], -item[0]))
+        return results[:limit]
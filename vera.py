@@ -1,16 +1,28 @@
+import time
+STARTUP_T0 = time.perf_counter()  # --startup-profile offsets are measured from here
+
 import sys
 import os
+import argparse
 import asyncio
+import bisect
+import codecs
 import webbrowser
 import ctypes
 import json
-import time
+import marshal
+import email.utils
+import hashlib
+import importlib
 import re
 import platform
-import subprocess
+import signal
 import threading
+import uuid
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 import multiprocessing
@@ -18,14 +30,23 @@ import multiprocessing
 # ============================================================================
 # ILE INTEGRATION (Isolated Learning Environment) - MODIFICATION #1
 # ============================================================================
-try:
-    from ile import ExperienceManager
-    ILE_ENABLED = True
-    print("✓ ILE module loaded - VERA will remember everything")
-except ImportError as e:
-    ILE_ENABLED = False
-    ExperienceManager = None
-    print(f"⚠ ILE module not available: {e}")
+ILE_ENABLED = True  # Set False to run without persistent memory
+ExperienceManager = None  # Imported on first use by load_ile()
+
+def load_ile() -> bool:
+    """Import the ILE package once; False if it is disabled or unavailable"""
+    global ILE_ENABLED, ExperienceManager
+    if ILE_ENABLED and ExperienceManager is None:
+        try:
+            from ile import ExperienceManager as manager_class
+            ExperienceManager = manager_class
+            print("✓ ILE module loaded - VERA will remember everything")
+        except ImportError as e:
+            ILE_ENABLED = False
+            print(f"⚠ ILE module not available: {e}")
+    return ILE_ENABLED and ExperienceManager is not None
+
+PARTIAL_REFLECTION = "Partial response"  # vera_reflection prefix of answers cut off mid-generation
 
 """
 TITLE: PERFORMANCE v3.0 - Multi-core, GPU, and Advanced Optimization
@@ -45,8 +66,15 @@ OPTIMIZATIONS:
 CPU_CORES = os.cpu_count() or 4
 print(f"[PERF] Detected {CPU_CORES} CPU cores")
 
-THREAD_POOL = ThreadPoolExecutor(max_workers=CPU_CORES)
-print(f"[PERF] Thread pool: {CPU_CORES} workers")
+THREAD_POOL = None  # Created on first use by get_thread_pool()
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Shared worker pool for blocking calls (SQLite), started on first use"""
+    global THREAD_POOL
+    if THREAD_POOL is None:
+        THREAD_POOL = ThreadPoolExecutor(max_workers=CPU_CORES)
+        print(f"[PERF] Thread pool: {CPU_CORES} workers")
+    return THREAD_POOL
 
 # Detect if running as .exe
 if getattr(sys, 'frozen', False):
@@ -58,28 +86,33 @@ else:
 print(f"[PERF] App path: {APP_PATH}")
 
 # ============================================================================
-# MODULE IMPORTS
+# MODULE IMPORTS - deferred until first use
 # ============================================================================
-try:
-    import ollama
-    print("[✓] Ollama module loaded")
-except ImportError as e:
-    print(f"[✗] Ollama import failed: {e}")
-    sys.exit(1)
+ollama = None
+websockets = None
+web = None
+# Together these take ~0.5s to import; the web server imports its two while
+# ollama loads on a startup thread, instead of all three before anything runs
 
-try:
-    import websockets
-    print("[✓] WebSockets module loaded")
-except ImportError as e:
-    print(f"[✗] WebSockets import failed: {e}")
-    sys.exit(1)
+LAZY_MODULES = {
+    "ollama": ("ollama", "Ollama"),
+    "websockets": ("websockets", "WebSockets"),
+    "web": ("aiohttp.web", "aiohttp"),
+}
 
-try:
-    from aiohttp import web
-    print("[✓] aiohttp module loaded")
-except ImportError as e:
-    print(f"[✗] aiohttp import failed: {e}")
-    sys.exit(1)
+def require_module(name: str):
+    """Import one of LAZY_MODULES into its global on first use; exits if missing"""
+    module = globals()[name]
+    if module is None:
+        path, label = LAZY_MODULES[name]
+        try:
+            module = importlib.import_module(path)
+        except ImportError as e:
+            print(f"[✗] {label} import failed: {e}")
+            sys.exit(1)
+        globals()[name] = module
+        print(f"[✓] {label} module loaded")
+    return module
 
 print("=" * 80)
 print("V.E.R.A - Very Efficient, Reliable Assistant")
@@ -109,10 +142,42 @@ class PerfConfig:
     NUM_GPU = -1  # Use all GPU if available
     NUM_THREADS_CORE = CPU_CORES  # Use all cores
     CONTEXT_WINDOW = 4096  # Larger context
+    HISTORY_LENGTH = 8  # Messages kept per conversation (ring buffer)
+    MAX_SESSIONS = 256  # Detached sessions kept for resume before eviction
+    
+    # [TITLE] Response Cache...
+    RESPONSE_CACHE_SIZE = 512  # Cached replies (LRU)
+    RESPONSE_CACHE_TTL = 3600  # Seconds a cached reply stays valid
+    RESPONSE_CACHE_WARM = 200  # Recent ILE experiences preloaded at startup (0 = off)
+    REWORDED_ANSWERS = False  # Reuse an ILE answer for an opening question asked with other filler words
     BATCH_SIZE = 512  # Larger batch
     
+    # [TITLE] Firewall...
+    FIREWALL_CACHE_SIZE = 1024  # Cached command verdicts (LRU)
+    
+    # [TITLE] LDS Hot Reload...
+    LDS_RELOAD_INTERVAL = 2.0  # Seconds between vera_data mtime checks (0 = off)
+    
+    # [TITLE] Generation Scheduling...
+    MAX_CONCURRENT_GENERATIONS = 2  # Generations streamed from Ollama at once (match OLLAMA_NUM_PARALLEL)
+    GENERATION_QUEUE_SIZE = 16  # Requests that may wait for a slot; more are rejected immediately
+    
+    # [TITLE] Commands...
+    ALLOW_COMMANDS = False  # Run shell commands sent as {"type": "command"} (opt-in; firewall still applies)
+    
+    # [TITLE] Streaming Optimization...
+    CHUNK_FLUSH_MS = 50  # Coalesce tokens into one chat_chunk frame for up to N ms
+    CHUNK_FLUSH_BYTES = 1024  # ...or until M bytes are buffered (0/0 = every token)
+    PERSIST_PARTIAL_RESPONSES = True  # Store stopped/superseded/disconnected answers in ILE
+    
+    # [TITLE] Static Files...
+    STATIC_CHECK_INTERVAL = 1.0  # Seconds between mtime checks of a served GUI file
+    STATIC_COMPRESS_MIN = 1024  # Bytes; smaller files are served uncompressed
+    
     # [TITLE] Ollama Optimization...
     KEEP_ALIVE = "10m"  # Keep model in VRAM longer
+    KEEP_ALIVE_REFRESH = 240  # Re-send keep-alive after N idle seconds while clients are connected (0 = off)
+    OLLAMA_HOST = os.environ.get("OLLAMA_HOST")  # None = ollama default (localhost:11434)
     
     @staticmethod
     def get_ollama_options():
@@ -129,18 +194,126 @@ class PerfConfig:
         }
     # [TITLE] Response Settings...
 
+# ============================================================================
+# METRICS - Prometheus text exposition at /metrics
+# ============================================================================
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and two additions
+    
+    No lock: every histogram has a single writer (the event loop, or the ILE
+    writer thread), and a scrape that reads mid-update is off by one sample
+    at most, which Prometheus tolerates.
+    """
+    
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help = help_text
+        self.bounds = sorted(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+    
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        total = 0
+        for bound, count in zip(self.bounds + [float("inf")], self.counts):
+            total += count
+            le = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {total}')
+        lines.append(f"{self.name}_sum {self.sum:.9g}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time, so the hot path never updates it"""
+    
+    def __init__(self, name: str, help_text: str, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+    
+    def render(self) -> list:
+        try:
+            value = self.read()
+        except Exception:
+            return []  # Source not available (yet); leave the series out
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge", f"{self.name} {value:g}"]
+
+
+class Metrics:
+    """Registry of histograms and gauges rendered for Prometheus"""
+    
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+    
+    def __init__(self):
+        self.series: Dict[str, object] = {}
+    
+    def histogram(self, name: str, help_text: str, buckets) -> Histogram:
+        histogram = Histogram(name, help_text, buckets)
+        self.series[name] = histogram
+        return histogram
+    
+    def gauge(self, name: str, help_text: str, read) -> Gauge:
+        """Register (or re-point) a gauge; read() returns the current value"""
+        gauge = Gauge(name, help_text, read)
+        self.series[name] = gauge
+        return gauge
+    
+    def render(self) -> str:
+        lines = []
+        for series in list(self.series.values()):
+            lines.extend(series.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TTFT_SECONDS = METRICS.histogram(
+    "vera_time_to_first_token_seconds", "Time from a chat message to the first model token, queueing included",
+    LATENCY_BUCKETS)
+QUEUE_SECONDS = METRICS.histogram(
+    "vera_generation_queue_seconds", "Time a chat message waited for a generation slot", LATENCY_BUCKETS)
+GENERATION_SECONDS = METRICS.histogram(
+    "vera_generation_seconds", "Time spent streaming a completed model response",
+    (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120))
+TOKENS_PER_SECOND = METRICS.histogram(
+    "vera_tokens_per_second", "Generation throughput of completed model responses",
+    (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000))
+ILE_WRITE_SECONDS = METRICS.histogram(
+    "vera_ile_write_seconds", "Time to commit one batch of interactions to ILE memory",
+    (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1))
+FIREWALL_SECONDS = METRICS.histogram(
+    "vera_firewall_check_seconds", "Time to decide whether a command is safe",
+    (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2))
+
 # ============================================================================
 # LDS MANAGER - Data Service
 # ============================================================================
 class LDSManager:
     """Load Data Service - manages JSON configuration files"""
     
+    FILES = {
+        "personality": "vera_personality.json",
+        "commands": "vera_commands.json",
+        "firewall": "vera_firewall.json",
+        "systemstate": "vera_system_state.json",
+    }
+    SNAPSHOT_FILE = ".lds_snapshot"
+    SNAPSHOT_VERSION = 1
+    
     def __init__(self, datadir="vera_data"):
         self.datadir = datadir
         self.personality = {}
         self.commands = {}
         self.firewall = {}
         self.systemstate = {}
+        self.signatures = {}  # filename -> (mtime_ns, size) last loaded or rejected
+        self.sources = {}  # filename -> (mtime_ns, size) of the data in use
+        self.indexes = {}  # filename -> {key: structure derived from the data in use}
         self.ensure_data_files()
         self.load_all_data()
         print("[LDS] Manager initialized")
@@ -151,30 +324,207 @@ class LDSManager:
         os.makedirs(os.path.join(self.datadir, "..", "logs"), exist_ok=True)
         print(f"[DATA] Directory: {self.datadir}")
     
+    def signature(self, filename: str) -> Optional[Tuple[int, int]]:
+        """(mtime_ns, size) of a data file, None if missing"""
+        try:
+            st = os.stat(os.path.join(self.datadir, filename))
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
     def load_file(self, filename: str) -> dict:
         """Load a JSON file from vera_data"""
         filepath = os.path.join(self.datadir, filename)
+        self.signatures[filename] = self.signature(filename)
         if not os.path.exists(filepath):
             print(f"[DATA] Missing: {filename}")
             return {}
         
         try:
             with open(filepath, "r", encoding="utf-8") as f:
-                return json.load(f)
+                data = json.load(f)
+            self.sources[filename] = self.signatures[filename]
+            self.indexes.pop(filename, None)
+            return data
         except Exception as e:
             print(f"[ERROR] Loading {filename}: {e}")
             return {}
     
     def load_all_data(self):
-        """Load all LDS files"""
-        self.personality = self.load_file("vera_personality.json")
-        self.commands = self.load_file("vera_commands.json")
-        self.firewall = self.load_file("vera_firewall.json")
-        self.systemstate = self.load_file("vera_system_state.json")
+        """Load all LDS files, from the snapshot where it is still current"""
+        start_time = time.perf_counter()
+        snapshot = self.read_snapshot()
+        from_snapshot = 0
+        for name, filename in self.FILES.items():
+            entry = snapshot.get(filename)
+            signature = self.signature(filename)
+            if (isinstance(entry, tuple) and len(entry) == 3 and signature is not None
+                    and tuple(entry[0]) == signature):
+                setattr(self, name, entry[1])
+                self.indexes[filename] = entry[2]
+                self.signatures[filename] = self.sources[filename] = signature
+                from_snapshot += 1
+            else:
+                setattr(self, name, self.load_file(filename))
+        
+        if from_snapshot < len(self.FILES):
+            self.write_snapshot()
+        elapsed = (time.perf_counter() - start_time) * 1000
+        print(f"[LDS] Data loaded in {elapsed:.2f}ms ({from_snapshot}/{len(self.FILES)} files from snapshot)")
         
         print(f"[LDS] Personality: {self.personality.get('metadata', {}).get('name', 'VERA')}")
         print(f"[LDS] Commands loaded: {self.commands.get('metadata', {}).get('total_commands', 0)}")
         print(f"[LDS] Firewall rules loaded")
+    
+    @staticmethod
+    def validate(name: str, data) -> None:
+        """Raise ValueError if a reloaded file would break its consumers"""
+        if not isinstance(data, dict) or not data:
+            raise ValueError("expected a non-empty JSON object")
+        
+        def expect(key, kind):
+            value = data.get(key)
+            if value is not None and not isinstance(value, kind):
+                raise ValueError(f'"{key}" must be a {kind.__name__}')
+            return value or kind()
+        
+        if name == "firewall":
+            if not all(isinstance(cmd, str) for cmd in expect("blacklisted_commands", list)):
+                raise ValueError('"blacklisted_commands" must contain strings')
+            for os_key, paths in expect("protected_paths", dict).items():
+                if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+                    raise ValueError(f'"protected_paths.{os_key}" must be a list of strings')
+            for rule in expect("dangerous_patterns", list):
+                if not isinstance(rule, dict):
+                    raise ValueError('"dangerous_patterns" must contain objects')
+                if not isinstance(rule.get("pattern", ""), str):
+                    raise ValueError(f'dangerous pattern {rule.get("pattern")!r} must be a string')
+                try:
+                    re.compile(rule.get("pattern", ""))
+                except re.error as e:
+                    raise ValueError(f'bad dangerous pattern {rule.get("pattern")!r}: {e}')
+            expect("self_protection", dict)
+            limits = expect("execution_limits", dict)
+            for key in ("max_timeout", "max_output_size", "max_concurrent_commands"):
+                if key in limits and not isinstance(limits[key], (int, float)):
+                    raise ValueError(f'"execution_limits.{key}" must be a number')
+        
+        elif name == "commands":
+            for category, info in expect("command_categories", dict).items():
+                if not isinstance(info, dict):
+                    raise ValueError(f'"command_categories.{category}" must be an object')
+            intents = expect("intents", dict)
+            for key in ("triggers", "extract_patterns"):
+                if not isinstance(intents.get(key, []), list):
+                    raise ValueError(f'"intents.{key}" must be a list')
+            IntentMatcher(intents, strict=True)  # Each pattern, and all of them combined
+        
+        elif name == "personality":
+            for key in ("identity", "personality", "communication_rules"):
+                expect(key, dict)
+    
+    def reload_changed(self) -> set:
+        """Reload data files whose mtime or size changed since last load
+        
+        Every changed file is parsed and validated before any is swapped in,
+        so consumers see either the old set or the new one. A file that fails
+        is reported and skipped until it changes again.
+        """
+        loaded = {}
+        for name, filename in self.FILES.items():
+            current = self.signature(filename)
+            if current is None or current == self.signatures.get(filename):
+                continue
+            try:
+                with open(os.path.join(self.datadir, filename), "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self.validate(name, data)
+            except (OSError, ValueError, TypeError) as e:
+                print(f"[LDS] Rejected {filename}, keeping previous version: {e}")
+                self.signatures[filename] = current
+                continue
+            loaded[name] = (data, current)
+        
+        # Signatures of accepted files are recorded only once they are applied,
+        # so a poll that fails part way retries them next time
+        for name, (data, current) in loaded.items():
+            setattr(self, name, data)
+            self.signatures[self.FILES[name]] = self.sources[self.FILES[name]] = current
+            self.indexes.pop(self.FILES[name], None)
+            print(f"[LDS] Reloaded {self.FILES[name]}")
+        if loaded:
+            self.write_snapshot()
+        return set(loaded)
+    
+    def derived(self, name: str, key: str, build):
+        """Plain-data structure built from an LDS file by build(data)
+        
+        Kept in the snapshot next to the data, so a fast start skips the
+        indexing work too; dropped whenever the file is reloaded.
+        """
+        filename = self.FILES[name]
+        indexes = self.indexes.setdefault(filename, {})
+        if key not in indexes:
+            start_time = time.perf_counter()
+            indexes[key] = build(getattr(self, name))
+            print(f"[LDS] Built {key} index for {filename} in {(time.perf_counter() - start_time) * 1000:.2f}ms")
+            if filename in self.sources:
+                self.write_snapshot()
+        return indexes[key]
+    
+    def read_snapshot(self) -> dict:
+        """{filename: (signature, data, indexes)} from the snapshot file, {} if unusable"""
+        try:
+            with open(os.path.join(self.datadir, self.SNAPSHOT_FILE), "rb") as f:
+                raw = f.read()  # marshal.load(f) would read in tiny pieces
+            digest, payload = raw[:32], raw[32:]
+            if hashlib.blake2b(payload, digest_size=32).digest() != digest:
+                raise ValueError("checksum mismatch")
+            snapshot = marshal.loads(payload)
+        except FileNotFoundError:
+            return {}
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            print(f"[LDS] Ignoring unreadable snapshot: {e}")
+            return {}
+        if (not isinstance(snapshot, dict)
+                or snapshot.get("version") != self.SNAPSHOT_VERSION
+                or snapshot.get("python") != sys.version):
+            return {}
+        # marshal's format is only stable within one Python build
+        files = snapshot.get("files")
+        return files if isinstance(files, dict) else {}
+    
+    def write_snapshot(self):
+        """Store the parsed data and indexes of every successfully loaded file
+        
+        marshal holds plain data only (no classes), loads faster than json,
+        and unlike pickle cannot run code from a tampered file.
+        """
+        files = {
+            filename: (self.sources[filename], getattr(self, name), self.indexes.get(filename, {}))
+            for name, filename in self.FILES.items()
+            if self.sources.get(filename) is not None
+        }
+        path = os.path.join(self.datadir, self.SNAPSHOT_FILE)
+        try:
+            payload = marshal.dumps({"version": self.SNAPSHOT_VERSION, "python": sys.version, "files": files})
+            with open(path + ".tmp", "wb") as f:
+                f.write(hashlib.blake2b(payload, digest_size=32).digest())
+                f.write(payload)
+            os.replace(path + ".tmp", path)
+        except (OSError, ValueError) as e:
+            print(f"[LDS] Could not write snapshot: {e}")
+    
+    async def watch(self, on_reload, interval: float):
+        """Poll the data files and call on_reload(changed names) after each swap"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = self.reload_changed()
+                if changed:
+                    on_reload(changed)
+            except Exception as e:
+                print(f"[LDS] Reload error: {e}")
     # [TITLE] LDS MANAGER ...
 
 # ============================================================================
@@ -212,49 +562,280 @@ class AdminDetector:
 # ============================================================================
 # VERA FIREWALL - Safety Layer
 # ============================================================================
-class VERAFirewall:
-    """Safety layer protecting system"""
+class LiteralMatcher:
+    """Multi-literal matcher: a trie of every literal compiled into one regex
     
-    def __init__(self, firewall_config: dict):
-        self.config = firewall_config
-        self.blocked_log = []
+    The trie shares prefixes, so the regex engine walks it in C at each
+    position of the text and the cost does not grow with the number of
+    literals. first_match() reports the earliest literal in list order
+    that occurs anywhere in the text, matching a linear `in` scan.
+    """
     
-    def is_command_safe(self, command: str) -> Tuple[bool, str]:
-        """Check if command is safe to execute
-        Returns: (is_safe, reason)
-        """
-        cmd_lower = command.lower().strip()
-        # [TITLE] FIREWALL ...
+    def __init__(self, literals: list):
+        self.literals = [lit for lit in literals if lit]
+        self.priority = {}
+        for index, literal in enumerate(self.literals):
+            self.priority.setdefault(literal, index)
+        
+        trie = {}
+        for literal in self.priority:
+            node = trie
+            for char in literal:
+                node = node.setdefault(char, {})
+            node[""] = True
         
-        # Check blacklisted commands
-        for blacklisted in self.config.get("blacklisted_commands", []):
-            if blacklisted.lower() in cmd_lower:
-                return False, f"Blocked: {blacklisted} is dangerous"
-        # [TITLE] Check blacklisted commands...
+        # A greedy match is the longest literal at its position; the others
+        # there are its prefixes, so precompute them (and the best priority)
+        self.prefixes = {}
+        self.best = {}
+        for literal in self.priority:
+            self.prefixes[literal] = [literal[:end] for end in range(1, len(literal) + 1)
+                                      if literal[:end] in self.priority]
+            self.best[literal] = min(self.priority[prefix] for prefix in self.prefixes[literal])
         
-        # Check dangerous patterns
-        for pattern_obj in self.config.get("dangerous_patterns", []):
+        self.regex = re.compile(f"(?=({self._pattern(trie)}))", re.DOTALL) if trie else None
+    
+    def _pattern(self, node: dict) -> str:
+        branches = [re.escape(char) + self._pattern(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{body})?" if "" in node else body
+    
+    def first_match(self, text: str) -> Optional[str]:
+        """Literal with the lowest list index found in text, or None"""
+        if self.regex is None:
+            return None
+        best = None
+        for match in self.regex.finditer(text):
+            index = self.best[match.group(1)]
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return None if best is None else self.literals[best]
+    
+    def find_all(self, text: str) -> set:
+        """Every literal that occurs in text"""
+        found = set()
+        if self.regex is not None:
+            for match in self.regex.finditer(text):
+                found.update(self.prefixes[match.group(1)])
+        return found
+
+
+class FirewallRules:
+    """vera_firewall.json compiled once into matchers"""
+    
+    def __init__(self, config: dict):
+        blacklisted = config.get("blacklisted_commands", [])
+        self.blacklist = LiteralMatcher([cmd.lower() for cmd in blacklisted])
+        self.blacklist_names = {cmd.lower(): cmd for cmd in reversed(blacklisted)}
+        
+        protected_paths = config.get("protected_paths", {})
+        system_protected = protected_paths.get("windows" if sys.platform == "win32" else "linux", [])
+        self.paths = LiteralMatcher([path.lower() for path in system_protected])
+        self.path_names = {path.lower(): path for path in reversed(system_protected)}
+        
+        self.patterns = []
+        for pattern_obj in config.get("dangerous_patterns", []):
             pattern = pattern_obj.get("pattern", "")
             try:
-                if re.search(pattern, cmd_lower):
-                    return False, f"Blocked: {pattern_obj.get('reason', 'dangerous pattern')}"
-            except:
-                pass
-        # [TITLE] Check dangerous patterns...
+                self.patterns.append((re.compile(pattern), pattern_obj.get("reason", "dangerous pattern")))
+            except (re.error, TypeError):
+                pass  # Invalid patterns never matched before either
         
-        # Check protected paths
-        protected_paths = self.config.get("protected_paths", {})
-        system_protected = protected_paths.get("windows" if sys.platform == "win32" else "linux", [])
+        # Patterns that contain a required literal ("eval", "__import__") are
+        # only tried when that literal occurs, found by one literal matcher;
+        # the rest share one combined regex that answers "could any match?".
+        # Patterns with groups or inline flags are always tried one by one:
+        # joined, their group numbers (\1, (?(1)...)) and flags would change
+        self.pattern_literals = {}
+        unfiltered = []
+        self.individual = []
+        for index, (regex, _) in enumerate(self.patterns):
+            literal = self._required_literal(regex.pattern)
+            if literal:
+                self.pattern_literals.setdefault(literal, []).append(index)
+            elif regex.groups or regex.flags != re.UNICODE:
+                self.individual.append(index)
+            else:
+                unfiltered.append(index)
+        self.literal_patterns = LiteralMatcher(list(self.pattern_literals))
+        self.unfiltered = unfiltered
+        self.any_unfiltered = None
+        if unfiltered:
+            try:
+                # Leading/trailing ".*" change nothing for search() but make
+                # every start position scan to the end of the line
+                self.any_unfiltered = re.compile("|".join(
+                    f"(?:{self._strip_wildcards(self.patterns[i][0].pattern)})" for i in unfiltered
+                ))
+            except re.error:
+                self.any_unfiltered = None  # Could not be combined; try them one by one
+    
+    @staticmethod
+    def _required_literal(pattern: str) -> str:
+        """Longest literal text every match of pattern must contain ("" if unsure)"""
+        if "|" in pattern or re.search(r"\(\?[aiLmsux-]", pattern):
+            return ""  # Alternation or inline flags: no single required literal
         
-        for protected in system_protected:
-            if protected.lower() in cmd_lower:
-                return False, f"Blocked: Cannot access protected path {protected}"
-        # [TITLE] Check protected paths...
+        best = run = ""
+        depth = 0
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            literal = None
+            if char == "\\":
+                start = i
+                escaped = pattern[i + 1:i + 2]
+                i += 2
+                if escaped and not escaped.isalnum():
+                    literal = escaped
+                elif escaped and escaped in "xuU":
+                    i += {"x": 2, "u": 4, "U": 8}[escaped]  # Hex digits are not literal text
+                elif escaped == "N" and pattern[i:i + 1] == "{":
+                    i = pattern.find("}", i) + 1 or len(pattern)
+                elif escaped.isdigit():
+                    while i < len(pattern) and pattern[i].isdigit() and i - start < 4:
+                        i += 1  # Octal escape or backreference: all its digits
+            elif char == "[":
+                i += 1
+                if pattern[i:i + 1] == "^":
+                    i += 1
+                if pattern[i:i + 1] == "]":
+                    i += 1  # A leading "]" is part of the class
+                while i < len(pattern) and pattern[i] != "]":
+                    i += 2 if pattern[i] == "\\" else 1
+                i += 1
+            elif char in "*?{":
+                run = run[:-1]  # The previous character is optional
+                i += 1
+                if char == "{":
+                    i = pattern.find("}", i) + 1 or len(pattern)
+            elif char in "+":
+                i += 1
+            elif char == "(":
+                depth += 1
+                i += 1
+            elif char == ")":
+                depth -= 1
+                i += 1
+            elif char in ".^$":
+                i += 1
+            else:
+                literal = char
+                i += 1
+            
+            if literal is not None and depth == 0:
+                run += literal
+                continue
+            if len(run) > len(best):
+                best = run
+            run = ""
+            if char in "*?{+" and i < len(pattern) and pattern[i] == "?":
+                i += 1  # Lazy quantifier
+        return max(best, run, key=len)
+    
+    @staticmethod
+    def _strip_wildcards(pattern: str) -> str:
+        while pattern.startswith(".*") and not pattern.startswith(".*?"):
+            pattern = pattern[2:]
+        while pattern.endswith(".*"):
+            head = pattern[:-2]
+            if (len(head) - len(head.rstrip("\\"))) % 2:
+                break  # The dot is escaped: a literal "." repeated
+            pattern = head
+        return pattern
+    
+    def _pattern_candidates(self, cmd_lower: str) -> list:
+        """Indexes of patterns that could match, in rule order"""
+        candidates = []
+        for literal in self.literal_patterns.find_all(cmd_lower):
+            candidates.extend(self.pattern_literals[literal])
+        if self.unfiltered and (self.any_unfiltered is None or self.any_unfiltered.search(cmd_lower)):
+            candidates.extend(self.unfiltered)
+        candidates.extend(self.individual)
+        return sorted(candidates)
+    
+    def check(self, cmd_lower: str) -> Tuple[bool, str, Optional[str]]:
+        """Verdict for an already lowercased, stripped command
+        Returns: (is_safe, reason, rule) - rule names the rule that fired
+        """
+        blacklisted = self.blacklist.first_match(cmd_lower)
+        if blacklisted is not None:
+            name = self.blacklist_names[blacklisted]
+            return False, f"Blocked: {name} is dangerous", f"blacklist:{name}"
+        
+        for index in self._pattern_candidates(cmd_lower):
+            regex, reason = self.patterns[index]
+            if regex.search(cmd_lower):
+                return False, f"Blocked: {reason}", f"pattern:{regex.pattern}"
+        
+        protected = self.paths.first_match(cmd_lower)
+        if protected is not None:
+            name = self.path_names[protected]
+            return False, f"Blocked: Cannot access protected path {name}", f"path:{name}"
         
         if ("vera.py" in cmd_lower or "vera_data" in cmd_lower) and any(op in cmd_lower for op in ["write", "delete", "rm"]):
-            return False, "Blocked: Cannot modify VERA core files"
+            return False, "Blocked: Cannot modify VERA core files", "self_protection"
+        
+        return True, "Safe to execute", None
+
+
+class VERAFirewall:
+    """Safety layer protecting system"""
+    
+    def __init__(self, firewall_config: dict, cache_size: int = PerfConfig.FIREWALL_CACHE_SIZE):
+        self.blocked_log = []
+        self.cache_size = cache_size
+        self.update_rules(firewall_config)
+    
+    def update_rules(self, firewall_config: dict, rules: Optional[FirewallRules] = None):
+        """Compile (or take precompiled) rules; cached verdicts and hit counts start over"""
+        if rules is None:
+            rules = FirewallRules(firewall_config)
+        # Compiled before anything is replaced, so checks never see half a rule set
+        self.config = firewall_config
+        self.rules = rules
+        self.verdict_cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.rule_hits = Counter()
+    
+    def is_command_safe(self, command: str) -> Tuple[bool, str]:
+        """Check if command is safe to execute
+        Returns: (is_safe, reason)
+        """
+        start_time = time.perf_counter()
+        cmd_lower = command.lower().strip()
+        verdict = self.verdict_cache.get(cmd_lower)
+        if verdict is None:
+            self.cache_misses += 1
+            verdict = self.rules.check(cmd_lower)
+            self.verdict_cache[cmd_lower] = verdict
+            if len(self.verdict_cache) > self.cache_size:
+                self.verdict_cache.popitem(last=False)
+        else:
+            self.cache_hits += 1
+            self.verdict_cache.move_to_end(cmd_lower)
+        # [TITLE] Verdict cache (LRU on the normalized command)...
         
-        return True, "Safe to execute"
+        is_safe, reason, rule = verdict
+        if rule is not None:
+            self.rule_hits[rule] += 1
+        FIREWALL_SECONDS.observe(time.perf_counter() - start_time)
+        return is_safe, reason
+    
+    def get_rule_stats(self) -> dict:
+        """Which rules fire and how often, plus verdict cache efficiency"""
+        return {
+            "rule_hits": dict(self.rule_hits.most_common()),
+            "cache_entries": len(self.verdict_cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+        }
     
     def log_blocked_command(self, command: str, reason: str):
         """Log security incident"""
@@ -277,47 +858,152 @@ class VERAFirewall:
 # ============================================================================
 # COMMAND EXECUTOR - System Commands
 # ============================================================================
+class IntentMatcher:
+    """Command-request detection driven by the "intents" block of vera_commands.json
+    
+    Whole-word triggers and the extraction patterns are compiled into one
+    regex, so a single left-to-right pass both classifies the message and
+    pulls out the command (the earliest extraction match wins).
+    
+    A pattern that fails to compile, alone or next to the ones before it
+    (e.g. a named group reused by another pattern), is skipped; with
+    strict=True it raises ValueError instead, which LDS validation uses.
+    """
+    
+    def __init__(self, intents: dict, strict: bool = False):
+        if strict and not all(isinstance(t, str) for t in intents.get("triggers", [])):
+            raise ValueError("intent triggers must be strings")
+        triggers = [t for t in intents.get("triggers", []) if t and isinstance(t, str)]
+        triggers = list(dict.fromkeys(t.lower() for t in triggers))
+        parts = []
+        self.extractors = []  # (outer group, command group) per pattern
+        groups = 0
+        for pattern in intents.get("extract_patterns", []):
+            try:
+                if not isinstance(pattern, str):
+                    raise re.error("not a string")
+                compiled = re.compile(pattern)
+                re.compile("|".join(parts + [f"({pattern})"]), re.IGNORECASE)
+            except re.error as e:
+                if strict:
+                    raise ValueError(f"bad intent pattern {pattern!r}: {e}")
+                print(f"[CMD] Skipping invalid intent pattern {pattern!r}: {e}")
+                continue
+            parts.append(f"({pattern})")
+            self.extractors.append((groups + 1, groups + 2 if compiled.groups else groups + 1))
+            groups += 1 + compiled.groups
+        
+        if triggers:
+            # Longest first so "get output" wins over a shorter overlapping trigger
+            words = "|".join(re.escape(t) for t in sorted(triggers, key=len, reverse=True))
+            parts.append(rf"\b(?:{words})\b")
+        
+        self.regex = re.compile("|".join(parts), re.IGNORECASE) if parts else None
+        if not triggers:
+            print("[CMD] No intent triggers in vera_commands.json - command detection disabled")
+    
+    def classify(self, message: str) -> Tuple[bool, Optional[str]]:
+        """(is_command_request, extracted command or None) in one pass"""
+        if self.regex is None:
+            return False, None
+        is_request = False
+        for match in self.regex.finditer(message):
+            is_request = True
+            for outer, inner in self.extractors:
+                if match.group(outer) is not None:
+                    return True, match.group(inner).strip()
+        return is_request, None
+
+
+class CommandSlots:
+    """Semaphore whose limit can change while slots are held
+    
+    Lowering the limit never interrupts running commands; new ones wait
+    until the running count is under the new limit.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = max(limit, 1)
+        self.held = 0
+        self.waiters = deque()
+    
+    def resize(self, limit: int):
+        self.limit = max(limit, 1)
+        self._wake()
+    
+    def _wake(self):
+        while self.waiters and self.held < self.limit:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.held += 1  # Taken on the waiter's behalf
+    
+    async def __aenter__(self):
+        if self.held < self.limit and not self.waiters:
+            self.held += 1
+            return self
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.held -= 1  # Granted just as it was cancelled: hand it on
+                self._wake()
+            elif waiter in self.waiters:
+                self.waiters.remove(waiter)
+            raise
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.held -= 1
+        self._wake()
+
+
 class CommandExecutor:
     """Executes system commands safely"""
     
-    def __init__(self, firewall: VERAFirewall):
+    def __init__(self, firewall: VERAFirewall, intents: Optional[dict] = None):
         self.firewall = firewall
+        self.intents = IntentMatcher(intents or {})
         self.execution_history = []
+        self.running = 0
+        self.slots = None
+        self.update_concurrency()
         print("[CMD] Command executor initialized")
     
+    def update_concurrency(self):
+        """Size the command slots from execution_limits (running commands keep their slot)"""
+        limits = self.firewall.config.get("execution_limits", {})
+        limit = int(limits.get("max_concurrent_commands", 1))
+        if self.slots is None:
+            self.slots = CommandSlots(limit)
+        else:
+            self.slots.resize(limit)  # Same slots: running and new commands share one limit
+    
+    @property
+    def limits(self) -> Tuple[float, int]:
+        """(timeout seconds, max output chars) from the firewall execution_limits"""
+        limits = self.firewall.config.get("execution_limits", {})
+        return float(limits.get("max_timeout", 30)), int(limits.get("max_output_size", 5000))
+    
     def is_command_request(self, message: str) -> bool:
         """Check if message is requesting command execution"""
-        triggers = [
-            "run", "command", "execute", "cmd", "command", "shell",
-            "bash", "powershell", "terminal", "run", "exec", "system",
-            "get output", "list", "show", "check", "ping", "test"
-        ]
-        return any(trigger in message.lower() for trigger in triggers)
+        return self.intents.classify(message)[0]
     
     def parse_command(self, message: str) -> Dict:
         """Parse command from message"""
-        patterns = [
-            r"run\s+(?:the\s+)?(?:following\s+)?command[:\s]+(.+)",
-            r"execute\s+(?:the\s+)?(.+)",
-            r"cmd\s+command[:\s]+(.+)",
-            r"`(.+?)`",
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, message, re.IGNORECASE)
-            if match:
-                cmd = match.group(1).strip()
-                return {"command": cmd, "found": True}
-        
-        if "`" in message or "'" in message or '"' in message:
-            quoted = re.findall(r"`(.+?)`", message)
-            if quoted:
-                return {"command": quoted[0], "found": True}
-        
-        return {"command": None, "found": False}
+        command = self.intents.classify(message)[1]
+        return {"command": command, "found": command is not None}
     
-    async def execute_command(self, command: str, admin_mode: bool) -> Dict:
-        """Execute a command and return output"""
+    async def execute_command(self, command: str, admin_mode: bool, on_output=None) -> Dict:
+        """Execute a command and return output
+        
+        Output is read incrementally; each piece within the size cap is passed
+        to `await on_output(stream, text)` as it arrives. Anything past the cap
+        is drained and counted but not kept. Cancelling the call kills the
+        process.
+        """
         print(f"[CMD] Attempting command...")
         # [TITLE] COMMAND EXECUTOR ...
         
@@ -332,262 +1018,1698 @@ class CommandExecutor:
             return {"success": False, "output": "Admin mode required for system commands", "mode": "client"}
         # [TITLE] Firewall check...
         
+        timeout, max_len = self.limits
+        async with self.slots:  # Limit simultaneous commands
+            self.running += 1
+            try:
+                return await self._run(command, timeout, max_len, on_output)
+            finally:
+                self.running -= 1
+    
+    async def _run(self, command: str, timeout: float, max_len: int, on_output) -> Dict:
+        """Run one command in a slot"""
         try:
-            result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=30)
-            output = result.stdout
-            if result.stderr:
-                output = f"{output}\n[STDERR]{result.stderr}"
-            # [TITLE] Execute...
-            
-            max_len = 5000
-            if len(output) > max_len:
-                output = output[:max_len] + f"\n... output truncated ({len(output)} total chars)"
-            
-            self.execution_history.append({
-                "command": command,
-                "return_code": result.returncode,
-                "timestamp": datetime.now().isoformat(),
-                "success": True
-            })
-            
-            print(f"[CMD] Exit code: {result.returncode}")
-            return {"success": True, "output": output, "return_code": result.returncode}
+            process = await asyncio.create_subprocess_shell(
+                command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                # Own process group on POSIX so a kill reaches the shell's children too
+                start_new_session=sys.platform != "win32"
+            )
+        except Exception as e:
+            return {"success": False, "output": f"Error: {str(e)}"}
+        
+        captured = {"stdout": [], "stderr": []}
+        totals = {"kept": 0, "seen": 0}
         
-        except subprocess.TimeoutExpired:
-            return {"success": False, "output": "Command timed out (30s limit)"}
+        async def pump(stream, name):
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            while True:
+                data = await stream.read(4096)
+                text = decoder.decode(data, final=not data)
+                if text:
+                    totals["seen"] += len(text)
+                    room = max_len - totals["kept"]
+                    if room > 0:
+                        text = text[:room]
+                        totals["kept"] += len(text)
+                        captured[name].append(text)
+                        if on_output is not None:
+                            await on_output(name, text)
+                if not data:
+                    return
+        # [TITLE] Execute, streaming output and enforcing the cap while reading...
+        
+        workers = [
+            asyncio.create_task(pump(process.stdout, "stdout")),
+            asyncio.create_task(pump(process.stderr, "stderr")),
+            asyncio.create_task(process.wait()),
+        ]
+        try:
+            done, pending = await asyncio.wait(
+                workers, timeout=timeout, return_when=asyncio.FIRST_EXCEPTION
+            )
+            for worker in done:
+                worker.result()  # Re-raise a failed read or on_output
+            if pending:
+                return {"success": False, "output": f"Command timed out ({timeout:g}s limit)"}
         except Exception as e:
             return {"success": False, "output": f"Error: {str(e)}"}
+        finally:
+            if process.returncode is None:
+                self._kill(process)  # Timed out, cancelled or the client went away
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        
+        output = "".join(captured["stdout"])
+        if captured["stderr"]:
+            output = f"{output}\n[STDERR]{''.join(captured['stderr'])}"
+        if totals["seen"] > totals["kept"]:
+            output += f"\n... output truncated ({totals['seen']} total chars)"
         # [TITLE] Limit output...
+        
+        self.execution_history.append({
+            "command": command,
+            "return_code": process.returncode,
+            "timestamp": datetime.now().isoformat(),
+            "success": True
+        })
+        
+        print(f"[CMD] Exit code: {process.returncode}")
+        return {"success": True, "output": output, "return_code": process.returncode}
+    
+    @staticmethod
+    def _kill(process):
+        """Kill a command together with anything its shell started"""
+        try:
+            if sys.platform == "win32":
+                process.kill()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
 
 # ============================================================================
-# VERA CORE - AI Engine
+# COMMAND KNOWLEDGE - LDS answers without the model
 # ============================================================================
-class VERACore:
-    """AI core with LDS support and high-performance optimization"""
+class CommandKnowledge:
+    """In-memory index of vera_commands.json: by name, alias and keyword, per OS
     
-    def __init__(self, model: str, lds: LDSManager):
-        self.model = model
-        self.lds = lds
-        self.admin_detector = AdminDetector()
-        self.firewall = VERAFirewall(lds.firewall)
-        self.command_executor = CommandExecutor(self.firewall)
-        self.conversation_history = []
-        self.interaction_count = 0
-        # [TITLE] VERA CORE ...
+    Entries under "windows"/"linux" belong to that OS; any other key in a
+    category ("common", "security", ...) applies to every OS. answer() turns
+    "what does X do" / "how do I use X" / "which command lists ..." questions
+    into a reply straight from LDS, so they never reach the model.
+    """
+    
+    OS_KEYS = ("windows", "linux")
+    STOPWORDS = frozenset((
+        "a", "an", "and", "are", "can", "command", "do", "does", "for", "from",
+        "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "should",
+        "the", "to", "use", "what", "which", "with", "you",
+    ))
+    NAME = r"[\w.+-]+"
+    QUESTIONS = re.compile(
+        r"^\s*(?:"
+        rf"what\s+does\s+(?:the\s+)?`?(?P<does>{NAME})`?(?:\s+command)?\s+do"
+        rf"|what(?:'?s|\s+is)\s+(?:the\s+)?`?(?P<is>{NAME})`?\s+command(?:\s+for)?"
+        rf"|how\s+(?:do|can|should)\s+i\s+use\s+(?:the\s+)?`?(?P<use>{NAME})`?(?:\s+command)?"
+        rf"|(?:syntax|usage)\s+(?:of|for)\s+(?:the\s+)?`?(?P<syntax>{NAME})`?(?:\s+command)?"
+        rf"|explain\s+(?:the\s+)?`?(?P<explain>{NAME})`?\s+command"
+        r"|(?:which|what)\s+command\s+(?:(?:do|can|should)\s+i\s+use\s+to\s+|to\s+|will\s+|)(?P<task>[\w\s'-]+?)"
+        r")(?:\s+(?:on|in|for)\s+(?P<os>windows|linux))?\s*[?.!]*\s*$",
+        re.IGNORECASE
+    )
+    
+    def __init__(self, index: dict, os_name: str):
+        self.os = "windows" if os_name.lower().startswith("win") else "linux"
+        self.entries = index["entries"]
+        self.by_name = index["by_name"]  # name or alias -> [entry index]
+        self.by_keyword = index["by_keyword"]  # stemmed description word -> {entry index}
+        self.hits = 0
+        self.lookups = 0
+        print(f"[LDS] Command index: {len(self.entries)} entries, {len(self.by_name)} names, {len(self.by_keyword)} keywords")
+    
+    @classmethod
+    def build_index(cls, commands: dict) -> dict:
+        """Index vera_commands.json as plain data, so LDSManager can snapshot it"""
+        entries, by_name, by_keyword = [], {}, {}
+        for category, info in commands.get("command_categories", {}).items():
+            for os_key, group in info.items():
+                if not isinstance(group, dict):
+                    continue
+                for name, details in group.items():
+                    if not isinstance(details, dict):
+                        continue
+                    entry = {
+                        "name": name,
+                        "category": category,
+                        "os": os_key if os_key in cls.OS_KEYS else None,
+                        "description": details.get("description", ""),
+                        "syntax": details.get("syntax", ""),
+                        "example": details.get("example", ""),
+                        "admin_required": bool(details.get("admin_required", False)),
+                    }
+                    index = len(entries)
+                    entries.append(entry)
+                    
+                    names = {name.lower()}
+                    for field in ("syntax", "example"):
+                        words = entry[field].split()
+                        if words:
+                            names.add(words[0].lower())
+                    # Aliases: the executable actually typed (netcat -> nc)
+                    for alias in names:
+                        by_name.setdefault(alias, []).append(index)
+                    for word in cls.keywords(f"{name} {entry['description']} {category}"):
+                        by_keyword.setdefault(word, set()).add(index)
+        return {"entries": entries, "by_name": by_name, "by_keyword": by_keyword}
+    
+    @classmethod
+    def keywords(cls, text: str) -> set:
+        """Lowercased, crudely stemmed content words"""
+        words = set()
+        for word in re.findall(r"[a-z][a-z0-9]*", text.lower()):
+            if word in cls.STOPWORDS:
+                continue
+            for suffix in ("ing", "es", "s"):
+                if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                    word = word[:-len(suffix)]
+                    break
+            words.add(word)
+        return words
+    
+    def lookup(self, name: str, os_key: Optional[str] = None) -> list:
+        """Entries for a command name or alias, this OS (or all-OS) first"""
+        entries = [self.entries[i] for i in self.by_name.get(name.lower(), ())]
+        os_key = os_key or self.os
+        local = [e for e in entries if e["os"] in (None, os_key)]
+        return local or entries
+    
+    def search(self, text: str, os_key: Optional[str] = None) -> Optional[dict]:
+        """Entry whose description best covers the words of a task description
         
-        # ILE: Persistent Memory System - MODIFICATION #2
-        if ILE_ENABLED and ExperienceManager is not None:
-            try:
-                self.experience_manager = ExperienceManager()
-                self.experience_manager.start_session(user_name="VERA_User")
-                total_exp = self.experience_manager.get_total_count()
-                print(f"[ILE] ✓ Total stored experiences: {total_exp}")
-            except Exception as e:
-                print(f"[ILE] Error initializing: {e}")
-                self.experience_manager = None
-        else:
-            self.experience_manager = None
+        Entries for os_key (or any OS) win over better-scoring ones for the
+        other OS; those are only returned when nothing local qualifies.
+        """
+        words = self.keywords(text)
+        if not words:
+            return None
+        scores = Counter()
+        for word in words:
+            for index in self.by_keyword.get(word, ()):
+                scores[index] += 1
+        os_key = os_key or self.os
+        best = None
+        for index, score in scores.items():
+            if not (score == len(words) or (score >= 2 and score * 2 > len(words))):
+                continue  # Weak overlap is left to the model
+            entry = self.entries[index]
+            rank = (entry["os"] in (None, os_key), score)
+            if best is None or rank > best[0]:
+                best = (rank, entry)
+        return best[1] if best is not None else None
+    
+    def equivalents(self, entry: dict, os_key: str) -> list:
+        """Names of os_key commands with the same description (ls <-> dir, ps <-> tasklist)"""
+        return sorted({
+            e["name"] for e in self.entries
+            if e["os"] == os_key and e["description"] == entry["description"]
+        })
+    
+    def describe(self, entry: dict, labelled: bool = False) -> str:
+        label = f" ({entry['os'].capitalize()})" if labelled and entry["os"] else ""
+        lines = [f"`{entry['name']}`{label}: {entry['description']}."]
+        if entry["syntax"]:
+            lines.append(f"Syntax: `{entry['syntax']}`")
+        if entry["example"]:
+            lines.append(f"Example: `{entry['example']}`")
+        if entry["admin_required"]:
+            lines.append("Requires admin privileges.")
+        return "\n".join(lines)
+    
+    def answer(self, message: str) -> Optional[str]:
+        """Reply to a command question from LDS, or None to let the model answer"""
+        match = self.QUESTIONS.match(message)
+        if match is None:
+            return None
+        self.lookups += 1
+        os_key = (match.group("os") or self.os).lower()
         
-        self.personality = self.build_system_prompt()
-        # [TITLE] Get personality from LDS...
+        if match.group("task"):
+            entry = self.search(match.group("task"), os_key)
+            if entry is None:
+                return None
+            text = self.describe(entry)
+            if entry["os"] not in (None, os_key):
+                equivalents = self.equivalents(entry, os_key)
+                if not equivalents:
+                    return None  # Only the other OS has it here; the model knows the local one
+                text = self.describe(entry, labelled=True)
+                text += f"\n\nOn {os_key.capitalize()}, use " + " / ".join(f"`{n}`" for n in equivalents) + "."
+        else:
+            name = next(match.group(g) for g in ("does", "is", "use", "syntax", "explain") if match.group(g))
+            entries = self.lookup(name, os_key)
+            if not entries:
+                return None
+            local = [e for e in entries if e["os"] in (None, os_key)]
+            shown = local[:1] or entries
+            text = "\n\n".join(self.describe(e, labelled=not local) for e in shown)
+            if not local:
+                equivalents = self.equivalents(shown[0], os_key)
+                if equivalents:
+                    text += f"\n\nOn {os_key.capitalize()}, use " + " / ".join(f"`{n}`" for n in equivalents) + "."
+                # Same description on the other OS: ls <-> dir, ps <-> tasklist
         
-        self.total_tokens = 0
-        self.total_time = 0.0
-        print("[VERA] Core initialized - ULTRA-OPTIMIZED")
-        print(f"[VERA] {self.admin_detector.get_mode_indicator()}")
-        print(f"[VERA] Model: {model}")
-        print(f"[VERA] Performance: {CPU_CORES} cores, GPU acceleration enabled")
+        self.hits += 1
+        return text
     
-    def build_system_prompt(self) -> str:
-        """Build system prompt from LDS personality"""
-        personality = self.lds.personality
-        
-        prompt = f"""You are {personality.get('identity', {}).get('title', 'VERA')}.
-
-CORE IDENTITY
-{personality.get('identity', {}).get('description', 'A professional AI assistant')}
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "names": len(self.by_name),
+            "keywords": len(self.by_keyword),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
 
-COMMUNICATION STYLE
-- Tone: {personality.get('personality', {}).get('tone', 'professional')}
-- {personality.get('communication_rules', {}).get('response_length', 'Keep responses brief')}
-- Formatting: {personality.get('communication_rules', {}).get('formatting', 'Clear and direct')}
+# ============================================================================
+# SESSION MANAGER - Per-connection conversation contexts
+# ============================================================================
+class ChatSession:
+    """One conversation: bounded ring-buffer history"""
+    
+    __slots__ = ("session_id", "history", "attached", "last_active")
+    
+    def __init__(self, session_id: str, max_history: int):
+        self.session_id = session_id
+        self.history = deque(maxlen=max_history)  # O(1) append, oldest evicted
+        self.attached = 0
+        self.last_active = time.monotonic()
+    
+    def add_message(self, role: str, content: str):
+        """Append a message, dropping the oldest once the buffer is full"""
+        self.history.append({"role": role, "content": content})
+        self.last_active = time.monotonic()
+    
+    def build_messages(self, system_prompt: str) -> list:
+        """Messages for the model: system prompt followed by the history"""
+        return [{"role": "system", "content": system_prompt}, *self.history]
 
-CURRENT MODE
-{self.admin_detector.get_mode_indicator()}
-{self.admin_detector.get_mode_message()}
 
-Keep responses SHORT (1-2 sentences max). Be helpful and professional."""
-        
-        return prompt
-    # [TITLE] Performance metrics...
+class SessionManager:
+    """Conversation contexts keyed by session id, resumable across reconnects"""
+    
+    def __init__(self, max_history: int = PerfConfig.HISTORY_LENGTH,
+                 max_sessions: int = PerfConfig.MAX_SESSIONS):
+        self.max_history = max_history
+        self.max_sessions = max_sessions
+        self.sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+    
+    def attach(self, session_id: Optional[str] = None) -> ChatSession:
+        """Resume session_id if it is known, otherwise start a new session"""
+        session = self.sessions.get(session_id) if session_id else None
+        if session is None:
+            session = ChatSession(uuid.uuid4().hex[:12], self.max_history)
+            self.sessions[session.session_id] = session
+            self._evict()
+        else:
+            self.sessions.move_to_end(session.session_id)
+        session.attached += 1
+        return session
+    
+    def detach(self, session: ChatSession):
+        """Connection closed; keep the history around for a later resume"""
+        session.attached = max(session.attached - 1, 0)
+        session.last_active = time.monotonic()
+    
+    def _evict(self):
+        """Drop the least recently used detached sessions above the limit"""
+        excess = len(self.sessions) - self.max_sessions
+        if excess <= 0:
+            return
+        for session_id in [sid for sid, s in self.sessions.items() if not s.attached][:excess]:
+            del self.sessions[session_id]
+    
+    def __len__(self):
+        return len(self.sessions)
 
 # ============================================================================
-# WEB SERVER - WebSocket & HTTP
+# RESPONSE CACHE - Exact-match replies without a model call
 # ============================================================================
-class WebServer:
-    """WebSocket server with streaming and performance optimizations"""
+class ResponseCache:
+    """LRU + TTL cache of complete model responses"""
     
-    def __init__(self, aicore: VERACore):
-        self.aicore = aicore
-        self.clients = set()
-        self.ws_server = None
+    def __init__(self, max_entries: int = PerfConfig.RESPONSE_CACHE_SIZE,
+                 ttl: float = PerfConfig.RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
     
-    async def start(self):
-        """Start servers"""
-        print("[WEB] Starting servers...")
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Case and whitespace insensitive form of a message"""
+        return " ".join(text.lower().split())
+    
+    def make_key(self, model: str, system_prompt: str, history, options: dict) -> str:
+        """Key on model, system prompt hash, normalized history and options"""
+        key = hashlib.sha1()
+        key.update(model.encode("utf-8"))
+        key.update(hashlib.sha1(system_prompt.encode("utf-8")).digest())
+        for message in history:
+            key.update(f"\x00{message['role']}\x01{self.normalize(message['content'])}".encode("utf-8"))
+        key.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        return key.hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Cached response for key, or None if missing or expired"""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, key: str, response: str):
+        """Store a response, evicting the least recently used beyond the limit"""
+        self.entries[key] = (time.monotonic() + self.ttl, response)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def clear(self):
+        self.entries.clear()
+    
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+# ============================================================================
+# MODEL WARM-UP - Keep the model resident in Ollama
+# ============================================================================
+class ModelWarmer:
+    """Preload the model and refresh its keep-alive while clients are connected
+    
+    Ollama unloads a model KEEP_ALIVE after its last request; the next
+    message then pays the whole load before its first token. An empty
+    /api/generate request loads the model without generating anything.
+    """
+    
+    def __init__(self, client, model: str, keep_alive: str = PerfConfig.KEEP_ALIVE,
+                 refresh: float = PerfConfig.KEEP_ALIVE_REFRESH):
+        self.client = client
+        self.model = model
+        self.keep_alive = keep_alive
+        self.keep_alive_seconds = self.parse_duration(keep_alive)
+        self.refresh = refresh
+        self.state = "cold"  # cold -> loading -> warm
+        self.last_used = None  # monotonic time of the last request that kept the model loaded
+        self.load_time = None  # seconds the last warm-up took (includes Ollama's load)
+        self.warmups = 0
+        self.task = None
+    
+    @staticmethod
+    def parse_duration(value) -> float:
+        """Seconds for an Ollama keep_alive ("10m", "30s", 300; negative = forever)"""
+        if isinstance(value, (int, float)):
+            seconds = float(value)
+        else:
+            text = str(value).strip()
+            units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+            unit = next((u for u in units if text.endswith(u)), "")
+            seconds = float(text[:len(text) - len(unit)]) * units.get(unit, 1)
+        return float("inf") if seconds < 0 else seconds
+    
+    @property
+    def is_warm(self) -> bool:
+        """True while the model should still be loaded in Ollama"""
+        return (self.state == "warm" and self.last_used is not None
+                and time.monotonic() - self.last_used < self.keep_alive_seconds)
+    
+    def touch(self):
+        """Record a chat request; each one restarts Ollama's keep-alive timer"""
+        self.state = "warm"
+        self.last_used = time.monotonic()
+    
+    async def warm(self) -> bool:
+        """Load the model (or just extend its keep-alive if it is loaded)"""
+        was_warm = self.is_warm
+        if self.state != "warm":
+            self.state = "loading"
+        start_time = time.perf_counter()
+        try:
+            await self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+        except Exception as e:
+            self.state = "warm" if self.is_warm else "cold"
+            print(f"[MODEL] Warm-up failed: {e}")
+            return False
+        self.load_time = time.perf_counter() - start_time
+        self.warmups += 1
+        self.touch()
+        if not was_warm:
+            print(f"[MODEL] {self.model} loaded in {self.load_time * 1000:.0f}ms")
+        return True
+    
+    def ensure_warm(self):
+        """Start a background warm-up unless the model is warm or already loading"""
+        if self.is_warm or self.state == "loading":
+            return
+        self.state = "loading"
+        self.task = asyncio.create_task(self.warm())
+    
+    async def keep_warm(self, has_clients):
+        """Refresh the keep-alive every `refresh` seconds of idleness while has_clients()"""
+        if not self.refresh:
+            return
+        while True:
+            idle = time.monotonic() - self.last_used if self.last_used is not None else self.refresh
+            if idle < self.refresh:
+                await asyncio.sleep(self.refresh - idle)
+                continue
+            # Chats in between already kept the model loaded
+            if has_clients() and self.state != "loading":
+                if await self.warm():
+                    print(f"[MODEL] Keep-alive refreshed ({self.load_time * 1000:.0f}ms)")
+                    continue
+            await asyncio.sleep(self.refresh)
+    
+    def status(self) -> dict:
+        return {
+            "model": self.model,
+            "state": "warm" if self.is_warm else ("loading" if self.state == "loading" else "cold"),
+            "warm": self.is_warm,
+            "load_time": self.load_time,
+            "idle": time.monotonic() - self.last_used if self.last_used is not None else None,
+            "warmups": self.warmups,
+        }
+
+# ============================================================================
+# VERA CORE - AI Engine
+# ============================================================================
+class VERACore:
+    """AI core with LDS support and high-performance optimization"""
+    
+    def __init__(self, model: str, lds: LDSManager, experience_manager=None):
+        """experience_manager: an open ILE ExperienceManager (see open_memory), or None for no memory"""
+        self.model = model
+        self.lds = lds
+        self.admin_detector = AdminDetector()
+        self.firewall = VERAFirewall(lds.firewall)
+        self.command_executor = CommandExecutor(self.firewall, lds.commands.get("intents"))
+        self.knowledge = CommandKnowledge(
+            lds.derived("commands", "knowledge", CommandKnowledge.build_index), self.admin_detector.ostype
+        )
+        self.sessions = SessionManager()
+        self.interaction_count = 0
+        self.client = require_module("ollama").AsyncClient(host=PerfConfig.OLLAMA_HOST)
+        # Async client: generations stream without blocking the event loop
+        self.warmer = ModelWarmer(self.client, model, PerfConfig.KEEP_ALIVE)
+        self.scheduler = GenerationScheduler(PerfConfig.MAX_CONCURRENT_GENERATIONS, PerfConfig.GENERATION_QUEUE_SIZE)
+        # [TITLE] VERA CORE ...
+        
+        self.experience_manager = experience_manager
+        # ILE memory is opened by open_memory(), concurrently with model detection
+        if experience_manager is not None:
+            experience_manager.on_write = lambda seconds, rows: ILE_WRITE_SECONDS.observe(seconds)
+        
+        self.personality = self.build_system_prompt()
+        # [TITLE] Get personality from LDS...
+        
+        self.response_cache = ResponseCache()
+        if PerfConfig.RESPONSE_CACHE_WARM and self.experience_manager is not None:
+            self.warm_response_cache(PerfConfig.RESPONSE_CACHE_WARM)
+        
+        self.total_tokens = 0
+        self.total_time = 0.0
+        print("[VERA] Core initialized - ULTRA-OPTIMIZED")
+        print(f"[VERA] {self.admin_detector.get_mode_indicator()}")
+        print(f"[VERA] Model: {model}")
+        print(f"[VERA] Performance: {CPU_CORES} cores, GPU acceleration enabled")
+    
+    @staticmethod
+    def open_memory():
+        """Open ILE persistent memory; None when ILE is disabled or fails"""
+        # ILE: Persistent Memory System - MODIFICATION #2
+        if not load_ile():
+            return None
+        try:
+            experience_manager = ExperienceManager()
+            experience_manager.start_session(user_name="VERA_User")
+            total_exp = experience_manager.get_total_count()
+            print(f"[ILE] ✓ Total stored experiences: {total_exp}")
+            return experience_manager
+        except Exception as e:
+            print(f"[ILE] Error initializing: {e}")
+            return None
+    
+    def build_system_prompt(self) -> str:
+        """Build system prompt from LDS personality"""
+        personality = self.lds.personality
+        
+        prompt = f"""You are {personality.get('identity', {}).get('title', 'VERA')}.
+
+CORE IDENTITY
+{personality.get('identity', {}).get('description', 'A professional AI assistant')}
+
+COMMUNICATION STYLE
+- Tone: {personality.get('personality', {}).get('tone', 'professional')}
+- {personality.get('communication_rules', {}).get('response_length', 'Keep responses brief')}
+- Formatting: {personality.get('communication_rules', {}).get('formatting', 'Clear and direct')}
+
+CURRENT MODE
+{self.admin_detector.get_mode_indicator()}
+{self.admin_detector.get_mode_message()}
+
+Keep responses SHORT (1-2 sentences max). Be helpful and professional."""
+        
+        return prompt
+    
+    def reload_lds(self, changed: set):
+        """Rebuild state derived from LDS files that were just swapped in
+        
+        Generations already streaming keep the prompt they started with;
+        the next message picks up the new one. Everything is built before
+        anything is replaced, so a failure leaves the previous state whole.
+        """
+        if "firewall" in changed:
+            rules = FirewallRules(self.lds.firewall)
+        if "commands" in changed:
+            intents = IntentMatcher(self.lds.commands.get("intents") or {})
+            knowledge = CommandKnowledge(
+                self.lds.derived("commands", "knowledge", CommandKnowledge.build_index), self.admin_detector.ostype
+            )
+        if "personality" in changed:
+            personality = self.build_system_prompt()
+        
+        if "firewall" in changed:
+            self.firewall.update_rules(self.lds.firewall, rules)
+            self.command_executor.update_concurrency()
+        if "commands" in changed:
+            self.command_executor.intents = intents
+            self.knowledge = knowledge
+        if "personality" in changed:
+            self.personality = personality
+            self.response_cache.clear()
+            # Cache keys include the system prompt: old answers can never hit again
+        print(f"[VERA] Applied LDS changes: {', '.join(sorted(changed))}")
+    
+    def cache_key(self, history) -> str:
+        """Response cache key for the conversation so far"""
+        return self.response_cache.make_key(
+            self.model, self.personality, history, PerfConfig.get_ollama_options()
+        )
+    
+    @staticmethod
+    def is_reusable(row: dict) -> bool:
+        """Whether a stored interaction holds a complete answer worth replaying"""
+        response = row.get("vera_response") or ""
+        if not response or row.get("response_length") != len(response):
+            return False  # Empty, or stored truncated
+        return not (row.get("vera_reflection") or "").startswith(PARTIAL_REFLECTION)
+    
+    def warm_response_cache(self, limit: int):
+        """Preload opening questions from ILE so repeats skip the model
+        
+        Only rows stored as the first turn of their conversation are keyed as
+        one: a follow-up ("why?") only makes sense after its earlier turns.
+        """
+        warmed = 0
+        for row in reversed(self.experience_manager.get_recent_interactions(limit, opening_only=True)):
+            if not row.get("user_input") or not self.is_reusable(row):
+                continue
+            self.response_cache.put(
+                self.cache_key([{"role": "user", "content": row["user_input"]}]), row["vera_response"]
+            )
+            warmed += 1
+        print(f"[VERA] Response cache warmed with {warmed} experiences")
+    
+    async def stream_chat(self, messages: list):
+        """Stream a chat completion from Ollama as an async iterator of chunks"""
+        stream = await self.client.chat(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            keep_alive=PerfConfig.KEEP_ALIVE,
+            options=PerfConfig.get_ollama_options()
+        )
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            self.warmer.touch()  # Ollama restarts its keep-alive timer per request
+            await stream.aclose()
+    # [TITLE] Performance metrics...
+    
+    @staticmethod
+    def generation_stats(final, chunks: int, ttft: Optional[float], generation_time: float) -> dict:
+        """Token accounting for one generation from Ollama's final (done) chunk
+        
+        prompt_eval_* is prefill and eval_* is decode; Ollama reports the
+        durations in nanoseconds. A stream cut short has no final chunk: the
+        streamed chunk count (one token each) and wall time stand in, and the
+        prompt figures are unknown (None).
+        """
+        def value(key: str) -> float:
+            return (final.get(key) if final is not None else None) or 0
+        
+        prompt_eval_time = value("prompt_eval_duration") / 1e9
+        if final is not None:
+            prompt_tokens = value("prompt_eval_count")
+            completion_tokens = value("eval_count")
+            eval_time = value("eval_duration") / 1e9
+        else:
+            prompt_tokens = None
+            completion_tokens = chunks
+            eval_time = generation_time
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "prefill_tokens_per_sec": round(prompt_tokens / prompt_eval_time, 2) if prompt_eval_time > 0 else 0.0,
+            "decode_tokens_per_sec": round(completion_tokens / eval_time, 2) if eval_time > 0 else 0.0,
+            "prompt_eval_time": round(prompt_eval_time, 4),
+            "eval_time": round(eval_time, 4),
+            "load_time": round(value("load_duration") / 1e9, 4),
+            "ttft": round(ttft, 4) if ttft is not None else None,
+        }
+
+# ============================================================================
+# GENERATION SCHEDULER - Admission control in front of Ollama
+# ============================================================================
+class GenerationQueueFull(Exception):
+    """Raised by GenerationScheduler.slot() when no more requests may wait"""
+
+
+class GenerationWaiter:
+    """One queued generation: its position and whether it was granted a slot"""
+    
+    def __init__(self, client):
+        self.client = client
+        self.position = None
+        self.granted = False
+        self.updated = asyncio.Event()
+
+
+class GenerationScheduler:
+    """Limit concurrent generations; queue the rest round-robin per client
+    
+    Ollama serves a handful of generations at once; beyond that every
+    stream slows down together. Requests over max_active wait here
+    instead, and the next free slot goes to the next client in rotation,
+    so one chatty client cannot starve the others. Once max_queue
+    requests are waiting, new ones are rejected straight away.
+    """
+    
+    def __init__(self, max_active: int = PerfConfig.MAX_CONCURRENT_GENERATIONS,
+                 max_queue: int = PerfConfig.GENERATION_QUEUE_SIZE):
+        self.max_active = max(max_active, 1)
+        self.max_queue = max(max_queue, 0)
+        self.active = 0
+        self.queues: "OrderedDict[object, deque]" = OrderedDict()  # client -> its waiters, in turn order
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+    
+    @asynccontextmanager
+    async def slot(self, client, on_position=None):
+        """Hold a generation slot for the body of the with block
+        
+        on_position(position) is awaited whenever this request's place in
+        the queue changes (1 = next); it is never called if a slot is free.
+        """
+        await self.acquire(client, on_position)
+        try:
+            yield
+        finally:
+            self.release()
+    
+    async def acquire(self, client, on_position=None):
+        if self.active < self.max_active and not self.waiting:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise GenerationQueueFull(f"{self.waiting} requests already waiting")
+        
+        waiter = GenerationWaiter(client)
+        self.queues.setdefault(client, deque()).append(waiter)
+        self.waiting += 1
+        self.queued += 1
+        self.publish_positions()
+        try:
+            reported = None
+            while True:
+                waiter.updated.clear()
+                if waiter.granted:
+                    return
+                if on_position is not None and waiter.position != reported:
+                    reported = waiter.position
+                    await on_position(reported)
+                    continue  # The queue may have moved during the send
+                await waiter.updated.wait()
+        except BaseException:
+            if waiter.granted:
+                self.release()
+            else:
+                self.remove(waiter)
+            raise
+    
+    def release(self):
+        self.active -= 1
+        while self.active < self.max_active and self.queues:
+            client, waiters = next(iter(self.queues.items()))
+            waiter = waiters.popleft()
+            del self.queues[client]
+            if waiters:
+                self.queues[client] = waiters  # Back of the rotation
+            self.waiting -= 1
+            self.active += 1
+            self.admitted += 1
+            waiter.granted = True
+            waiter.updated.set()
+        self.publish_positions()
+    
+    def remove(self, waiter: GenerationWaiter):
+        """Drop a request that gave up waiting (client left or cancelled)"""
+        waiters = self.queues.get(waiter.client)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del self.queues[waiter.client]
+        self.waiting -= 1
+        self.publish_positions()
+    
+    def publish_positions(self):
+        """Number every waiter in the order release() will serve them"""
+        position = 0
+        depth = 0
+        pending = True
+        while pending:
+            pending = False
+            for waiters in self.queues.values():
+                if depth < len(waiters):
+                    position += 1
+                    waiter = waiters[depth]
+                    if waiter.position != position:
+                        waiter.position = position
+                        waiter.updated.set()
+                    pending = pending or depth + 1 < len(waiters)
+            depth += 1
+    
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+# ============================================================================
+# CHUNK COALESCER - Fewer websocket frames per response
+# ============================================================================
+class ChunkCoalescer:
+    """Batch streamed tokens into chat_chunk frames
+    
+    The first token is always released immediately so time-to-first-token is
+    unchanged; later tokens are held until CHUNK_FLUSH_MS has passed since the
+    last frame or CHUNK_FLUSH_BYTES are buffered. paced() wakes the caller
+    when held tokens fall due during a model pause, and flush() releases the
+    remainder when the stream ends. Limits default to PerfConfig at creation.
+    """
+    
+    def __init__(self, flush_ms: Optional[float] = None, flush_bytes: Optional[int] = None):
+        if flush_ms is None:
+            flush_ms = PerfConfig.CHUNK_FLUSH_MS
+        if flush_bytes is None:
+            flush_bytes = PerfConfig.CHUNK_FLUSH_BYTES
+        self.flush_interval = flush_ms / 1000
+        self.flush_bytes = flush_bytes
+        self.buffer = []
+        self.size = 0
+        self.last_flush = None
+        self.frames = 0
+    
+    def add(self, token: str) -> Optional[str]:
+        """Buffer a token; returns the text to send when a frame is due"""
+        if not token:
+            return None
+        self.buffer.append(token)
+        self.size += len(token.encode("utf-8"))
+        
+        now = time.monotonic()
+        if (self.last_flush is None
+                or self.size >= self.flush_bytes
+                or now - self.last_flush >= self.flush_interval):
+            return self._take(now)
+        return None
+    
+    def time_left(self) -> Optional[float]:
+        """Seconds until the held tokens are due, None if nothing is held"""
+        if not self.buffer:
+            return None
+        return max(self.last_flush + self.flush_interval - time.monotonic(), 0.0)
+    
+    async def paced(self, chunks):
+        """Iterate chunks, yielding None whenever held tokens fall due first
+        
+        The next chunk is awaited in a task so the deadline can pass without
+        cancelling the stream; the caller sends flush() on None.
+        """
+        chunks = chunks.__aiter__()
+        pending = None
+        try:
+            while True:
+                if pending is None and not self.buffer:
+                    try:
+                        chunk = await chunks.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    yield chunk  # Nothing held: no deadline to watch
+                    continue
+                if pending is None:
+                    pending = asyncio.ensure_future(chunks.__anext__())
+                done, _ = await asyncio.wait((pending,), timeout=self.time_left())
+                if not done:
+                    yield None
+                    continue
+                task, pending = pending, None
+                try:
+                    chunk = task.result()
+                except StopAsyncIteration:
+                    return
+                yield chunk
+        finally:
+            if pending is not None:
+                pending.cancel()
+                try:
+                    await pending  # The stream must be idle before it is closed
+                except (asyncio.CancelledError, Exception):
+                    pass
+    
+    def flush(self) -> Optional[str]:
+        """Release whatever is still buffered"""
+        if not self.buffer:
+            return None
+        return self._take(time.monotonic())
+    
+    def _take(self, now: float) -> str:
+        text = "".join(self.buffer)
+        self.buffer.clear()
+        self.size = 0
+        self.last_flush = now
+        self.frames += 1
+        return text
+
+# ============================================================================
+# STATIC FILES - GUI served from memory
+# ============================================================================
+class StaticAsset:
+    """One static file held in memory with its precompressed variants"""
+    
+    def __init__(self, candidates, content_type: str):
+        self.candidates = candidates  # First existing path wins
+        self.content_type = content_type
+        self.path = None
+        self.signature = None
+        self.checked = 0.0
+        self.etag = None
+        self.last_modified = None
+        self.mtime = 0
+        self.bodies: Dict[str, bytes] = {}
+    
+    def locate(self):
+        """(path, (mtime_ns, size)) of the first candidate on disk, or (None, None)"""
+        for path in self.candidates:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return path, (st.st_mtime_ns, st.st_size)
+        return None, None
+    
+    def load(self, path: str, signature):
+        """Read and compress the file; runs in the thread pool"""
+        with open(path, "rb") as f:
+            body = f.read()
+        bodies = {"identity": body}
+        if len(body) >= PerfConfig.STATIC_COMPRESS_MIN:
+            for encoding, compress in StaticFiles.compressors().items():
+                packed = compress(body)
+                if len(packed) < len(body):
+                    bodies[encoding] = packed
+        self.path = path
+        self.signature = signature
+        self.mtime = signature[0] // 1_000_000_000
+        self.etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        self.last_modified = email.utils.formatdate(self.mtime, usegmt=True)
+        self.bodies = bodies
+
+
+class StaticFiles:
+    """Routes to in-memory static files with ETag/Last-Modified validation
+    
+    Files are read and compressed once. Disk is consulted at most every
+    STATIC_CHECK_INTERVAL seconds per file, and a file is reloaded only when
+    its mtime or size changed, so a burst of reconnecting GUIs costs no I/O.
+    """
+    
+    _compressors = None
+    
+    def __init__(self, check_interval: float = PerfConfig.STATIC_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self.assets: Dict[str, StaticAsset] = {}
+        self.lock = asyncio.Lock()
+        self.served = 0
+        self.not_modified = 0
+        self.loads = 0
+    
+    @classmethod
+    def compressors(cls) -> dict:
+        """Content-Encoding -> compress function; brotli only if installed"""
+        if cls._compressors is None:
+            import gzip
+            cls._compressors = {"gzip": lambda body: gzip.compress(body, 9, mtime=0)}
+            try:
+                import brotli
+                cls._compressors["br"] = lambda body: brotli.compress(body, quality=11)
+            except ImportError:
+                pass
+        return cls._compressors
+    
+    def add(self, route: str, *candidates: str, content_type: str = "text/html"):
+        self.assets[route] = StaticAsset(list(candidates), content_type)
+    
+    async def get(self, route: str) -> Optional[StaticAsset]:
+        """Asset for a route, reloaded first if the file changed on disk"""
+        asset = self.assets.get(route)
+        if asset is None:
+            return None
+        if time.monotonic() - asset.checked >= self.check_interval:
+            async with self.lock:
+                if time.monotonic() - asset.checked >= self.check_interval:
+                    await self.refresh(asset)
+        return asset if asset.path is not None else None
+    
+    async def refresh(self, asset: StaticAsset):
+        path, signature = asset.locate()
+        if path is None:
+            asset.path = None
+            asset.signature = None
+            asset.bodies = {}
+        elif (path, signature) != (asset.path, asset.signature):
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    get_thread_pool(), asset.load, path, signature
+                )
+                self.loads += 1
+                print(f"[WEB] Loaded {os.path.basename(path)} "
+                      f"({', '.join(f'{k} {len(v)}B' for k, v in asset.bodies.items())})")
+            except OSError as e:
+                print(f"[WEB] Could not load {path}: {e}")
+        asset.checked = time.monotonic()
+    
+    async def preload(self):
+        for route in self.assets:
+            await self.get(route)
+    
+    @staticmethod
+    def accepted_encodings(header: str) -> set:
+        """Codings allowed by an Accept-Encoding header (q=0 excluded, * expanded)"""
+        weights = {}
+        for part in header.split(","):
+            coding, _, params = part.strip().partition(";")
+            q = 1.0
+            for param in params.split(";"):
+                name, _, value = param.strip().partition("=")
+                if name == "q":
+                    try:
+                        q = float(value)
+                    except ValueError:
+                        q = 0.0
+            if coding:
+                weights[coding.lower()] = q
+        wildcard = weights.pop("*", 0.0)
+        return {coding for coding in ("br", "gzip") if weights.get(coding, wildcard) > 0}
+    
+    @staticmethod
+    def is_fresh(request, asset: StaticAsset) -> bool:
+        """True if the client's cached copy is current (If-None-Match, then If-Modified-Since)"""
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            for tag in if_none_match.split(","):
+                tag = tag.strip()
+                if tag.startswith("W/"):
+                    tag = tag[2:]
+                if tag.strip('"').split("-")[0] == asset.etag:
+                    return True
+            return False
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return asset.mtime <= since
+        return False
+    
+    async def respond(self, request, route: str):
+        asset = await self.get(route)
+        if asset is None:
+            return None
+        accepted = self.accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        encoding = next((e for e in ("br", "gzip") if e in accepted and e in asset.bodies), "identity")
+        headers = {
+            "ETag": f'"{asset.etag}"' if encoding == "identity" else f'"{asset.etag}-{encoding}"',
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": "no-cache",  # Always revalidate; a 304 is cheap
+            "Vary": "Accept-Encoding",
+        }
+        if self.is_fresh(request, asset):
+            self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        self.served += 1
+        return web.Response(body=asset.bodies[encoding], content_type=asset.content_type,
+                            charset="utf-8", headers=headers)
+    
+    def stats(self) -> dict:
+        return {
+            "files": sum(1 for asset in self.assets.values() if asset.path is not None),
+            "served": self.served,
+            "not_modified": self.not_modified,
+            "loads": self.loads,
+        }
+
+# ============================================================================
+# WEB SERVER - WebSocket & HTTP
+# ============================================================================
+class WebServer:
+    """WebSocket server with streaming and performance optimizations"""
+    
+    def __init__(self, aicore: Optional[VERACore] = None, host: str = "localhost",
+                 ws_port: int = 8766, http_port: int = 8765):
+        """Port 0 binds a free port; the bound ports are set once start() returns"""
+        self.aicore = None
+        self.host = host
+        self.ws_port = ws_port
+        self.http_port = http_port
+        self.ready = asyncio.Event()
+        self.clients = set()
+        self.ws_server = None
+        self.runner = None
+        self.static = StaticFiles()
+        self.preload = None
+        METRICS.gauge("vera_connected_clients", "Open websocket connections", lambda: len(self.clients))
+        METRICS.gauge("vera_generations_queued", "Chat messages waiting for a generation slot",
+                      lambda: self.aicore.scheduler.waiting)
+        METRICS.gauge("vera_generations_active", "Generations streaming from Ollama",
+                      lambda: self.aicore.scheduler.active)
+        self.static.add("/", os.path.join(APP_PATH, "vera_interface_v2.html"),
+                        os.path.join(APP_PATH, "vera-enhanced.html"))
+        if aicore is not None:
+            self.attach(aicore)
+    
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}"
+    
+    @property
+    def http_url(self) -> str:
+        return f"http://{self.host}:{self.http_port}"
+    
+    def attach(self, aicore: VERACore):
+        """Hand over the AI core; websocket clients that connected early start now"""
+        self.aicore = aicore
+        self.ready.set()
+    
+    async def start(self):
+        """Start servers (they accept connections before attach(); the GUI loads meanwhile)
+        
+        HTTP comes up first: its bound port is the origin the websocket accepts.
+        """
+        print("[WEB] Starting servers...")
+        require_module("websockets")
+        require_module("web")
+        
+        # HTTP server
+        app = web.Application()
+        for route in self.static.assets:
+            app.router.add_get(route, self.serve_static)
+        app.router.add_get("/metrics", self.serve_metrics)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        self.http_server = web.TCPSite(self.runner, self.host, self.http_port)
+        await self.http_server.start()
+        self.http_port = self.runner.addresses[0][1]
+        print(f"[WEB] HTTP started on {self.http_url} (optimized)")
         
         # WebSocket server
         self.ws_server = await websockets.serve(
             self.handle_ws,
-            "localhost",
-            8766,
+            self.host,
+            self.ws_port,
             # [TITLE] WEB SERVER ...
+            origins=self.allowed_origins(),
             max_size=2**20,  # 1MB max message
             max_queue=32,
             compression=None,  # Disable compression overhead
             ping_interval=None,  # Disable ping-pong
         )
-        print(f"[WEB] WebSocket started on ws://localhost:8766 (optimized)")
+        self.ws_port = self.ws_server.sockets[0].getsockname()[1]
+        print(f"[WEB] WebSocket started on {self.ws_url} (optimized)")
+        self.preload = asyncio.create_task(self.static.preload())  # Ready before the browser asks
+    
+    def allowed_origins(self) -> list:
+        """Origins that may open the websocket: the GUI's own page, or no Origin at all
         
-        # HTTP server
-        app = web.Application()
-        app.router.add_get("/", self.serve_gui)
-        runner = web.AppRunner(app)
-        await runner.setup()
-        self.http_server = web.TCPSite(runner, "localhost", 8765)
-        await self.http_server.start()
-        print(f"[WEB] HTTP started on http://localhost:8765 (optimized)")
+        Browsers always send Origin, so other web pages the user visits are
+        refused; local tools and scripts send none and are let through.
+        """
+        hosts = {self.host, "localhost", "127.0.0.1"} if self.host in ("localhost", "127.0.0.1") else {self.host}
+        return [f"http://{host}:{self.http_port}" for host in sorted(hosts)] + [None]
     
-    async def serve_gui(self, request):
-        """Serve GUI"""
-        gui_files = [
-            os.path.join(APP_PATH, "vera_interface_v2.html"),
-            os.path.join(APP_PATH, "vera-enhanced.html"),
-        ]
+    async def stop(self):
+        """Close both servers"""
+        self.ready.set()  # Release clients still waiting for a core that never came
+        if self.ws_server is not None:
+            self.ws_server.close()
+            await self.ws_server.wait_closed()
+        if self.runner is not None:
+            await self.runner.cleanup()
+    
+    async def serve_metrics(self, request):
+        """Prometheus scrape endpoint"""
+        return web.Response(body=METRICS.render().encode("utf-8"),
+                            headers={"Content-Type": Metrics.CONTENT_TYPE})
+    
+    async def serve_static(self, request):
+        """Serve the GUI (and other static files) from memory"""
+        response = await self.static.respond(request, request.path)
+        if response is None:
+            return web.Response(text="GUI not found", status=404)
+        return response
+    
+    async def handle_search(self, websocket, data: dict):
+        """Answer a {"type": "search"} message from the ILE full-text index
         
-        for gui_file in gui_files:
-            if os.path.exists(gui_file):
+        Searches every stored interaction: rows are kept under the process-wide
+        ILE session, not the per-connection session_id clients receive, so
+        there is no session filter here.
+        """
+        manager = self.aicore.experience_manager
+        if manager is None:
+            await websocket.send(json.dumps({
+                "type": "error",
+                "response": "Memory search unavailable: ILE is disabled",
+                "success": False
+            }))
+            return
+        
+        query = str(data.get("query", ""))
+        limit = data.get("limit", 10)
+        try:
+            if isinstance(limit, bool):
+                raise ValueError
+            limit = min(max(int(limit), 1), 50)
+        except (TypeError, ValueError, OverflowError):
+            await websocket.send(json.dumps({
+                "type": "error",
+                "response": f"Invalid search limit {data.get('limit')!r}: expected a whole number from 1 to 50",
+                "success": False
+            }))
+            return
+        start_time = time.time()
+        results = await asyncio.get_running_loop().run_in_executor(
+            get_thread_pool(), manager.search, query, limit
+        )
+        # [TITLE] SQLite runs on the thread pool, never on the event loop...
+        
+        await websocket.send(json.dumps({
+            "type": "search_results",
+            "query": query,
+            "results": [
+                {key: row[key] for key in ("id", "session_id", "timestamp", "user_input", "vera_response")}
+                for row in results
+            ],
+            "count": len(results),
+            "time": time.time() - start_time
+        }))
+    
+    async def handle_stats(self, websocket):
+        """Answer a {"type": "stats"} message with counters from the fast paths"""
+        await websocket.send(json.dumps({
+            "type": "stats",
+            "lds_fast_path": self.aicore.knowledge.stats(),
+            "response_cache": self.aicore.response_cache.stats(),
+            "firewall_rules": self.aicore.firewall.get_rule_stats(),
+            "model": self.aicore.warmer.status(),
+            "generations": self.aicore.scheduler.stats(),
+            "static": self.static.stats(),
+            "clients": len(self.clients),
+            "sessions": len(self.aicore.sessions)
+        }))
+    
+    def remember(self, user_input: str, response: str, opening: bool, partial: Optional[str] = None,
+                 stats: Optional[dict] = None):
+        """Queue an interaction for ILE persistent memory
+        
+        opening marks the first turn of a conversation; only those are
+        replayed to other sessions. partial names why a response was cut
+        short; such answers are kept for recall but never replayed as cached
+        answers. stats are the generation_stats() of a model answer.
+        """
+        # ============================================================
+        # ILE: Store interaction in persistent memory - MODIFICATION #3
+        # ============================================================
+        if self.aicore.experience_manager is not None:
+            try:
+                self.aicore.experience_manager.store_interaction(
+                    user_input=user_input,
+                    vera_response=response,
+                    confidence=0.75,  # Phase 1: fixed value
+                    reflection=f"{PARTIAL_REFLECTION} ({partial})" if partial else "Phase 1: Basic storage",
+                    domain=None,  # Phase 2: will extract domain
+                    metrics=stats,
+                    opening=opening,
+                )
+                total = self.aicore.experience_manager.get_total_count()
+                print(f"[ILE] Total experiences: {total}")
+            except Exception as e:
+                print(f"[ILE] Error storing: {e}")
+    
+    async def handle_chat(self, websocket, session: ChatSession, user_input: str, data: dict):
+        """Answer one chat message, streaming chat_start/chat_chunk/chat_complete"""
+        session.add_message("user", user_input)
+        opening = len(session.history) == 1
+        # [TITLE] Add user message to history FIRST (ring buffer keeps it short)...
+        
+        await websocket.send(json.dumps({
+            "type": "chat_start",
+            "mode": self.aicore.admin_detector.get_mode_indicator(),
+            "model_warm": self.aicore.warmer.is_warm
+        }))
+        
+        cache = self.aicore.response_cache
+        cache_key = None
+        if data.get("cache", True) is not False:
+            answer = self.aicore.knowledge.answer(user_input)
+            if answer is not None:
+                await self.replay_cached(websocket, session, user_input, answer, source="lds")
+                return
+            
+            cache_key = self.aicore.cache_key(session.history)
+            cached = cache.get(cache_key)
+            if cached is not None:
+                await self.replay_cached(websocket, session, user_input, cached)
+                return
+            
+            reworded = await self.find_reworded(session, user_input)
+            if reworded is not None:
+                cache.put(cache_key, reworded["vera_response"])
+                await self.replay_cached(websocket, session, user_input, reworded["vera_response"],
+                                         source="memory")
+                return
+        # [TITLE] LDS command answers, exact-match response cache, then reworded ILE answers ("cache": false skips all three)...
+        
+        start_time = time.time()
+        full_response = ""
+        chunk_count = 0
+        first_token = None
+        final = None
+        queue_time = None
+        finished = False
+        coalescer = ChunkCoalescer()
+        # [TITLE] Send start signal...
+        
+        async def queued(position: int):
+            await websocket.send(json.dumps({
+                "type": "queued",
+                "position": position
+            }))
+        
+        try:
+            async with self.aicore.scheduler.slot(session.session_id, on_position=queued):
+                queue_time = time.time() - start_time
+                QUEUE_SECONDS.observe(queue_time)
+                # [TITLE] Wait for a generation slot (clients take turns when Ollama is busy)...
+                
+                response = self.aicore.stream_chat(
+                    session.build_messages(self.aicore.personality)
+                )
+                # [TITLE] ULTRA-OPTIMIZED streaming with all performance settings...
+                
+                chunks = coalescer.paced(response)
                 try:
-                    with open(gui_file, "r", encoding="utf-8") as f:
-                        content = f.read()
-                    return web.Response(text=content, content_type="text/html")
-                except:
+                    async for chunk in chunks:
+                        if chunk is None:
+                            text = coalescer.flush()
+                            if text is not None:
+                                await websocket.send(json.dumps({
+                                    "type": "chat_chunk",
+                                    "chunk": text
+                                }))
+                            continue
+                        # [TITLE] Held tokens are due while the model pauses...
+                        
+                        if chunk.get("done"):
+                            final = chunk  # Carries Ollama's token counts and timings
+                        token = chunk["message"]["content"]
+                        if not token:
+                            continue  # e.g. the final done chunk: stats, no text
+                        if first_token is None:
+                            first_token = time.time() - start_time
+                            TTFT_SECONDS.observe(first_token)
+                        full_response += token
+                        chunk_count += 1
+                        # [TITLE] Stream chunks directly from Ollama...
+                        
+                        text = coalescer.add(token)
+                        if text is not None:
+                            await websocket.send(json.dumps({
+                                "type": "chat_chunk",
+                                "chunk": text
+                            }))
+                        # [TITLE] First token immediately, then coalesced frames...
+                finally:
+                    await chunks.aclose()
+                    await response.aclose()
+                    # Closing the HTTP stream makes Ollama stop generating right away
+            finished = True
+            
+            text = coalescer.flush()
+            if text is not None:
+                await websocket.send(json.dumps({
+                    "type": "chat_chunk",
+                    "chunk": text
+                }))
+            
+            session.add_message("assistant", full_response)
+            if cache_key is not None and full_response:
+                cache.put(cache_key, full_response)
+            # [TITLE] Add assistant response to history...
+            
+            elapsed = time.time() - start_time
+            generation_time = elapsed - queue_time
+            stats = self.aicore.generation_stats(final, chunk_count, first_token, generation_time)
+            
+            self.aicore.total_tokens += stats["completion_tokens"]
+            self.aicore.total_time += generation_time
+            GENERATION_SECONDS.observe(generation_time)
+            TOKENS_PER_SECOND.observe(stats["decode_tokens_per_sec"])
+            # [TITLE] Update performance metrics (token counts from Ollama, not characters)...
+            
+            self.remember(user_input, full_response, opening, stats=stats)
+            
+            await websocket.send(json.dumps({
+                "type": "chat_complete",
+                "time": elapsed,
+                "success": True,
+                "response": full_response,
+                "chars": len(full_response),
+                "tokens": stats["completion_tokens"],
+                "tokens_per_sec": stats["decode_tokens_per_sec"],
+                **stats,
+                "chunks": chunk_count,
+                "frames": coalescer.frames,
+                "queue_time": queue_time,
+                "cached": False,
+                "source": "model"
+            }))
+            
+            print(f"[AI] Response in {elapsed:.2f}s ({queue_time:.2f}s queued, first token {stats['ttft'] or 0:.2f}s), "
+                  f"{stats['prompt_tokens']}+{stats['completion_tokens']} tokens, "
+                  f"prefill {stats['prefill_tokens_per_sec']:.1f} / decode {stats['decode_tokens_per_sec']:.1f} toks/s, "
+                  f"{chunk_count} chunks in {coalescer.frames} frames")
+        
+        except asyncio.CancelledError as e:
+            if finished:
+                raise  # The answer was complete; only the last frames were cut
+            reason = e.args[0] if e.args else "cancelled"
+            # Stopped, superseded by a newer message, or the client left;
+            # the upstream stream and the generation slot are already released
+            print(f"[AI] Generation {reason} after {time.time() - start_time:.2f}s, {len(full_response)} chars produced")
+            generation_time = time.time() - start_time - queue_time if queue_time is not None else 0.0
+            stats = self.aicore.generation_stats(final, chunk_count, first_token, generation_time)
+            if full_response:
+                session.add_message("assistant", full_response)
+                if PerfConfig.PERSIST_PARTIAL_RESPONSES:
+                    self.remember(user_input, full_response, opening, partial=reason, stats=stats)
+            if reason != "disconnected":
+                try:
+                    text = coalescer.flush()
+                    if text is not None:
+                        await websocket.send(json.dumps({
+                            "type": "chat_chunk",
+                            "chunk": text
+                        }))
+                    await websocket.send(json.dumps({
+                        "type": "chat_complete",
+                        "time": time.time() - start_time,
+                        "success": False,
+                        "cancelled": True,
+                        "reason": reason,
+                        "response": full_response,
+                        "chars": len(full_response),
+                        "tokens": stats["completion_tokens"],
+                        **stats,
+                        "chunks": chunk_count,
+                        "frames": coalescer.frames,
+                        "cached": False,
+                        "source": "model"
+                    }))
+                except websockets.ConnectionClosed:
                     pass
+            raise
+        
+        except GenerationQueueFull as e:
+            print(f"[AI] Busy, request rejected: {e}")
+            await websocket.send(json.dumps({
+                "type": "error",
+                "response": "VERA is busy with other requests. Please try again in a moment.",
+                "busy": True,
+                "success": False
+            }))
+        
+        except Exception as e:
+            error_msg = str(e)
+            print(f"[AI] Error: {error_msg}")
+            
+            await websocket.send(json.dumps({
+                "type": "error",
+                "response": f"Error: {error_msg}",
+                "success": False
+            }))
+    
+    async def run_chat(self, websocket, session: ChatSession, user_input: str, data: dict):
+        """handle_chat as a connection task: errors are reported instead of lost"""
+        try:
+            await self.handle_chat(websocket, session, user_input, data)
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            print(f"[WEB] Handler Error: {e}")
+            try:
+                await websocket.send(json.dumps({
+                    "type": "error",
+                    "response": f"Error: {e}",
+                    "success": False
+                }))
+            except websockets.ConnectionClosed:
+                pass
+    
+    async def find_reworded(self, session: ChatSession, user_input: str) -> Optional[dict]:
+        """Stored interaction answering an opening question asked in other words
+        
+        Matched on ILE's question_key (case, punctuation and filler words
+        ignored, content words in order), never on similarity scores.
+        """
+        manager = self.aicore.experience_manager
+        if manager is None or not PerfConfig.REWORDED_ANSWERS or len(session.history) != 1:
+            return None
+        # Only opening questions: later turns depend on the conversation so far
         
-        return web.Response(text="GUI not found", status=404)
+        return await asyncio.get_running_loop().run_in_executor(
+            get_thread_pool(), manager.find_same_question, user_input, self.aicore.is_reusable
+        )
+    
+    async def replay_cached(self, websocket, session: ChatSession, user_input: str, response: str,
+                            source: str = "cache"):
+        """Send a ready-made response through the normal chat_chunk/chat_complete protocol"""
+        start_time = time.time()
+        step = max(PerfConfig.CHUNK_FLUSH_BYTES, 1)
+        frames = 0
+        for offset in range(0, len(response), step):
+            await websocket.send(json.dumps({
+                "type": "chat_chunk",
+                "chunk": response[offset:offset + step]
+            }))
+            frames += 1
+        
+        opening = len(session.history) == 1
+        session.add_message("assistant", response)
+        self.remember(user_input, response, opening)
+        elapsed = time.time() - start_time
+        
+        await websocket.send(json.dumps({
+            "type": "chat_complete",
+            "time": elapsed,
+            "success": True,
+            "response": response,
+            "chars": len(response),
+            "tokens": 0,  # No model tokens were generated
+            "tokens_per_sec": 0,
+            "chunks": frames,
+            "frames": frames,
+            "cached": True,
+            "source": source
+        }))
+        
+        if source == "lds":
+            stats = self.aicore.knowledge.stats()
+            print(f"[LDS] Fast-path answer in {elapsed * 1000:.1f}ms ({stats['hits']} answered from LDS)")
+            return
+        stats = self.aicore.response_cache.stats()
+        kind = "reworded" if source == "memory" else "exact"
+        print(f"[AI] Cached response ({kind}) in {elapsed * 1000:.1f}ms ({stats['hits']} hits / {stats['misses']} misses)")
+    
+    async def handle_command(self, websocket, data: dict):
+        """Run a {"type": "command"} request, streaming its output as it arrives"""
+        command = str(data.get("command", "")).strip()
+        executor = self.aicore.command_executor
+        try:
+            if not PerfConfig.ALLOW_COMMANDS:
+                await websocket.send(json.dumps({
+                    "type": "error",
+                    "response": "Commands are disabled (set PerfConfig.ALLOW_COMMANDS to enable)",
+                    "success": False
+                }))
+                return
+            
+            if not command:
+                await websocket.send(json.dumps({
+                    "type": "error",
+                    "response": "No command given",
+                    "success": False
+                }))
+                return
+            
+            await websocket.send(json.dumps({
+                "type": "command_start",
+                "command": command,
+                "running": executor.running
+            }))
+            
+            async def forward(stream: str, text: str):
+                await websocket.send(json.dumps({
+                    "type": "command_output",
+                    "stream": stream,
+                    "output": text
+                }))
+            
+            start_time = time.time()
+            result = await executor.execute_command(
+                command, self.aicore.admin_detector.is_admin, on_output=forward
+            )
+            await websocket.send(json.dumps({
+                "type": "command_complete",
+                "command": command,
+                "time": time.time() - start_time,
+                **result
+            }))
+        except websockets.ConnectionClosed:
+            pass  # Client left; the process has already been stopped
+        except Exception as e:
+            print(f"[CMD] Handler Error: {e}")
     
     async def handle_ws(self, websocket):
         """Handle WebSocket with ultra-optimized streaming"""
+        await self.ready.wait()
+        if self.aicore is None:
+            return  # Startup failed
+        # Connections opened during startup wait here until the core is attached
         self.clients.add(websocket)
+        self.aicore.warmer.ensure_warm()
+        # Reload the model now if it timed out while nobody was connected
+        session = self.aicore.sessions.attach()
+        tasks = set()  # Background work owned by this connection
+        generation = None  # The chat answer in progress, if any
         print(f"[WEB] Client connected ({len(self.clients)} total)")
         
         try:
+            await websocket.send(json.dumps({
+                "type": "session",
+                "session_id": session.session_id,
+                "model_warm": self.aicore.warmer.is_warm
+            }))
+            
             async for message in websocket:
                 try:
                     data = json.loads(message)
-                    user_input = data.get("message", "").strip()
                     
-                    if not user_input:
+                    requested = data.get("session_id")
+                    if requested and requested != session.session_id:
+                        self.aicore.sessions.detach(session)
+                        session = self.aicore.sessions.attach(requested)
+                        await websocket.send(json.dumps({
+                            "type": "session",
+                            "session_id": session.session_id,
+                            "resumed": session.session_id == requested
+                        }))
+                    # Resume a previous conversation by id
+                    
+                    if data.get("type") == "search":
+                        await self.handle_search(websocket, data)
                         continue
-                    # [TITLE] Performance optimizations...
+                    # Memory recall over stored experiences
                     
-                    self.aicore.conversation_history.append({
-                        "role": "user",
-                        "content": user_input
-                    })
-                    # [TITLE] Add user message to history FIRST...
+                    if data.get("type") == "stats":
+                        await self.handle_stats(websocket)
+                        continue
                     
-                    if len(self.aicore.conversation_history) > 8:
-                        self.aicore.conversation_history = self.aicore.conversation_history[-8:]
-                    # [TITLE] Keep history short for speed...
+                    if data.get("type") == "stop":
+                        if generation is not None and not generation.done():
+                            generation.cancel("stopped")
+                        continue
+                    # Stop button: end the answer now, keeping what was already sent
                     
-                    await websocket.send(json.dumps({
-                        "type": "chat_start",
-                        "mode": self.aicore.admin_detector.get_mode_indicator()
-                    }))
+                    if data.get("type") == "command":
+                        task = asyncio.create_task(self.handle_command(websocket, data))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                        continue
+                    # System commands run alongside chat and stop on disconnect
                     
-                    start_time = time.time()
-                    full_response = ""
-                    chunk_count = 0
-                    # [TITLE] Send start signal...
+                    user_input = data.get("message", "").strip()
                     
-                    try:
-                        response = ollama.chat(
-                            model=self.aicore.model,
-                            messages=[
-                                {"role": "system", "content": self.aicore.personality},
-                                *self.aicore.conversation_history[-8:]
-                            ],
-                            stream=True,
-                            keep_alive=PerfConfig.KEEP_ALIVE,
-                            options=PerfConfig.get_ollama_options()
-                        )
-                        # [TITLE] ULTRA-OPTIMIZED streaming with all performance settings...
-                        
-                        for chunk in response:
-                            token = chunk["message"]["content"]
-                            full_response += token
-                            chunk_count += 1
-                            # [TITLE] Stream chunks directly from Ollama...
-                            
-                            await websocket.send(json.dumps({
-                                "type": "chat_chunk",
-                                "chunk": token
-                            }))
-                            # [TITLE] Send every token for real-time streaming...
-                        
-                        self.aicore.conversation_history.append({
-                            "role": "assistant",
-                            "content": full_response
-                        })
-                        # [TITLE] Add assistant response to history...
-                        
-                        elapsed = time.time() - start_time
-                        # [TITLE] Add assistant response to history...
-                        
-                        self.aicore.total_tokens += len(full_response)
-                        self.aicore.total_time += elapsed
-                        avg_tokens_per_sec = len(full_response) / elapsed if elapsed > 0 else 0
-                        # [TITLE] Update performance metrics...
-                        
-                        # ============================================================
-                        # ILE: Store interaction in persistent memory - MODIFICATION #3
-                        # ============================================================
-                        if self.aicore.experience_manager is not None:
-                            try:
-                                self.aicore.experience_manager.store_interaction(
-                                    user_input=user_input,
-                                    vera_response=full_response,
-                                    confidence=0.75,  # Phase 1: fixed value
-                                    reflection="Phase 1: Basic storage",
-                                    domain=None,  # Phase 2: will extract domain
-                                )
-                                total = self.aicore.experience_manager.get_total_count()
-                                print(f"[ILE] Total experiences: {total}")
-                            except Exception as e:
-                                print(f"[ILE] Error storing: {e}")
-                        
-                        await websocket.send(json.dumps({
-                            "type": "chat_complete",
-                            "time": elapsed,
-                            "success": True,
-                            "response": full_response,
-                            "tokens": len(full_response),
-                            "tokens_per_sec": round(avg_tokens_per_sec, 2),
-                            "chunks": chunk_count
-                        }))
-                        
-                        print(f"[AI] Response in {elapsed:.2f}s, {len(full_response)} chars, {avg_tokens_per_sec:.1f} toks/s")
+                    if not user_input:
+                        continue
+                    # [TITLE] Performance optimizations...
                     
-                    except Exception as e:
-                        error_msg = str(e)
-                        print(f"[AI] Error: {error_msg}")
-                        
-                        await websocket.send(json.dumps({
-                            "type": "error",
-                            "response": f"Error: {error_msg}",
-                            "success": False
-                        }))
+                    if generation is not None and not generation.done():
+                        generation.cancel("superseded")
+                        await asyncio.wait({generation})
+                    # A newer message replaces an answer still being generated
+                    
+                    generation = asyncio.create_task(self.run_chat(websocket, session, user_input, data))
+                    tasks.add(generation)
+                    generation.add_done_callback(tasks.discard)
+                    # Runs as a task so stop/newer messages are read while it streams
                 
                 except json.JSONDecodeError as e:
                     print(f"[WEB] JSON Error: {e}")
@@ -609,41 +2731,112 @@ class WebServer:
             print(f"[WEB] WebSocket error: {e}")
         
         finally:
+            for task in tasks:
+                task.cancel("disconnected")
             self.clients.discard(websocket)
+            self.aicore.sessions.detach(session)
             print(f"[WEB] Client disconnected ({len(self.clients)} remaining)")
             # [TITLE] Send completion with performance metrics...
 
 # ============================================================================
 # MAIN APPLICATION
 # ============================================================================
+class StartupProfile:
+    """Per-phase startup timings, printed with --startup-profile"""
+    
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.phases = []  # (name, start, end) in perf_counter seconds
+    
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start, time.perf_counter()))
+    
+    async def in_thread(self, name: str, func, *args):
+        """Run a blocking startup step on a thread, timed as its own phase"""
+        with self.phase(name):
+            return await asyncio.to_thread(func, *args)
+    
+    def report(self):
+        if not self.enabled:
+            return
+        print("[STARTUP] Phase            start      end   duration  (ms since process start)")
+        for name, start, end in sorted(self.phases, key=lambda phase: phase[1]):
+            print(f"[STARTUP] {name:<14} {(start - STARTUP_T0) * 1000:>8.1f} {(end - STARTUP_T0) * 1000:>8.1f} {(end - start) * 1000:>9.1f}")
+
 class VERAApplication:
     """Main application with ultra-optimization"""
     
+    def __init__(self, startup_profile: bool = False):
+        self.profile = StartupProfile(startup_profile)
+    
     async def run(self):
         """Run application"""
+        profile = self.profile
+        profile.phases.append(("import vera", STARTUP_T0, time.perf_counter()))
         try:
             print("[MAIN] Starting VERA LDS Edition ULTRA-OPTIMIZED...")
             # [TITLE] MAIN ...
             
-            lds = LDSManager()
+            with profile.phase("lds"):
+                lds = LDSManager()
             # [TITLE] Load LDS data...
             
-            model = self.detect_model()
+            webserver = WebServer()
+            self.webserver = webserver
+            with profile.phase("web servers"):
+                await webserver.start()
+            ports_open = time.perf_counter()
+            # Ports first: imports are CPU-bound and share the GIL, so running
+            # them alongside the steps below would only delay the ports
+            
+            model_task = asyncio.create_task(profile.in_thread("detect model", self.detect_model))
+            memory_task = asyncio.create_task(profile.in_thread("ile open", VERACore.open_memory))
+            # Model detection (ollama import + HTTP) and the ILE database open
+            # are independent and mostly wait on I/O; both run on threads
+            
+            try:
+                await asyncio.to_thread(webbrowser.open, webserver.http_url)
+            except:
+                pass
+            # [TITLE] The GUI loads while the core is still starting...
+            
+            model, memory = await asyncio.gather(model_task, memory_task)
             if not model:
                 print("[MAIN] No Ollama model found!")
                 print("[MAIN] Please run: ollama pull llama2:3.2-3b")
+                if memory is not None:
+                    memory.close()
                 return
             # [TITLE] Detect model...
             
-            aicore = VERACore(model, lds)
-            webserver = WebServer(aicore)
-            await webserver.start()
+            with profile.phase("core"):
+                aicore = VERACore(model, lds, memory)
+            self.aicore = aicore
+            webserver.attach(aicore)
+            ready = time.perf_counter()
+            
+            aicore.warmer.ensure_warm()
+            self.keep_alive_task = asyncio.create_task(
+                aicore.warmer.keep_warm(lambda: bool(webserver.clients))
+            )
+            # [TITLE] Load the model in the background so the first message doesn't pay for it...
+            
+            if PerfConfig.LDS_RELOAD_INTERVAL:
+                self.lds_watcher = asyncio.create_task(
+                    lds.watch(aicore.reload_lds, PerfConfig.LDS_RELOAD_INTERVAL)
+                )
+            # [TITLE] Edits to vera_data apply without a restart...
             
             print("=" * 80)
             print("VERA LDS OPTIMIZED is running")
             print("=" * 80)
-            print(f"[INFO] Interface: http://localhost:8765")
-            print(f"[INFO] WebSocket: ws://localhost:8766")
+            print(f"[INFO] Interface: {webserver.http_url}")
+            print(f"[INFO] WebSocket: {webserver.ws_url}")
             print(f"[INFO] Mode: {aicore.admin_detector.get_mode_indicator()}")
             print(f"[INFO] Model: {model}")
             print(f"[INFO] CPU Cores: {CPU_CORES} (all enabled)")
@@ -652,6 +2845,9 @@ class VERAApplication:
             print(f"[INFO] Max Tokens: {PerfConfig.NUM_PREDICT}")
             print(f"[INFO] Thread Pool: {CPU_CORES} workers")
             print(f"[INFO] Firewall: ACTIVE")
+            print(f"[INFO] Generations: {PerfConfig.MAX_CONCURRENT_GENERATIONS} at once, {PerfConfig.GENERATION_QUEUE_SIZE} may queue")
+            print(f"[INFO] LDS Hot Reload: {f'every {PerfConfig.LDS_RELOAD_INTERVAL}s' if PerfConfig.LDS_RELOAD_INTERVAL else 'OFF'}")
+            print(f"[INFO] Startup: ports open after {(ports_open - STARTUP_T0) * 1000:.0f}ms, ready after {(ready - STARTUP_T0) * 1000:.0f}ms")
             print("=" * 80)
             print("PERFORMANCE OPTIMIZATIONS ACTIVE")
             print(f"- Multi-core processing ({CPU_CORES} cores)")
@@ -660,13 +2856,7 @@ class VERAApplication:
             print(f"- Optimized batch processing")
             print(f"- Real-time token streaming")
             print("=" * 80)
-            
-            await asyncio.sleep(1)
-            
-            try:
-                webbrowser.open("http://localhost:8765")
-            except:
-                pass
+            profile.report()
             # [TITLE] Initialize VERA...
             
             # Keep running
@@ -675,19 +2865,32 @@ class VERAApplication:
         
         except KeyboardInterrupt:
             print("[MAIN] Terminated")
-            # Close ILE database on shutdown - MODIFICATION #4
-            if hasattr(self, 'aicore') and hasattr(self.aicore, 'experience_manager'):
-                if self.aicore.experience_manager is not None:
-                    try:
-                        self.aicore.experience_manager.close()
-                        print("[ILE] Database closed cleanly")
-                    except Exception as e:
-                        print(f"[ILE] Error closing: {e}")
         
         except Exception as e:
             print(f"[MAIN] Error: {e}")
             import traceback
             traceback.print_exc()
+        
+        finally:
+            if hasattr(self, 'webserver'):
+                try:
+                    await self.webserver.stop()
+                except Exception as e:
+                    print(f"[WEB] Error stopping servers: {e}")
+            self.shutdown()
+    
+    def shutdown(self):
+        """Release resources; runs on every exit path, including Ctrl+C"""
+        # Close ILE database on shutdown - MODIFICATION #4
+        # close() commits every queued interaction before ending the session
+        if hasattr(self, 'aicore') and hasattr(self.aicore, 'experience_manager'):
+            if self.aicore.experience_manager is not None:
+                try:
+                    self.aicore.experience_manager.close()
+                    print("[ILE] Database closed cleanly")
+                except Exception as e:
+                    print(f"[ILE] Error closing: {e}")
+                self.aicore.experience_manager = None
     
     @staticmethod
     def detect_model():
@@ -704,7 +2907,7 @@ class VERAApplication:
         
         try:
             print("[MODEL] Detecting available models...")
-            models = ollama.list()
+            models = require_module("ollama").list()
             
             if not models.models:
                 return None
@@ -730,7 +2933,12 @@ class VERAApplication:
 # ============================================================================
 def main():
     """Entry point"""
-    app = VERAApplication()
+    parser = argparse.ArgumentParser(description="V.E.R.A - Very Efficient, Reliable Assistant")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print a per-phase startup timing breakdown")
+    args = parser.parse_args()
+    
+    app = VERAApplication(startup_profile=args.startup_profile)
     try:
         asyncio.run(app.run())
     except KeyboardInterrupt: